@@ -148,3 +148,97 @@ AUTH_USER_MODEL = 'at2p_app.Planter'
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Outbound scraping (timeanddate.com)
+
+SCRAPE_POOL_SIZE = int(os.environ.get('SCRAPE_POOL_SIZE', 10))
+
+SCRAPE_CONNECT_TIMEOUT = float(os.environ.get('SCRAPE_CONNECT_TIMEOUT', 3.05))
+
+SCRAPE_READ_TIMEOUT = float(os.environ.get('SCRAPE_READ_TIMEOUT', 10))
+
+# Outbound requests per second (and burst size) allowed per host; 0 disables
+
+SCRAPE_RATE_LIMIT = float(os.environ.get('SCRAPE_RATE_LIMIT', 5))
+
+SCRAPE_RATE_BURST = float(os.environ.get('SCRAPE_RATE_BURST', 10))
+
+# Adaptive (AIMD) limit on in-flight scrapes; requests slower than the
+# latency target (seconds) or failing shrink it
+
+SCRAPE_CONCURRENCY_INITIAL = int(os.environ.get('SCRAPE_CONCURRENCY_INITIAL', 4))
+
+SCRAPE_CONCURRENCY_MIN = int(os.environ.get('SCRAPE_CONCURRENCY_MIN', 1))
+
+SCRAPE_CONCURRENCY_MAX = int(os.environ.get('SCRAPE_CONCURRENCY_MAX', 32))
+
+SCRAPE_LATENCY_TARGET = float(os.environ.get('SCRAPE_LATENCY_TARGET', 2.0))
+
+# Seconds a profile view may spend refreshing weather before it falls back
+# to the stored values; 0 disables the deadline
+
+PROFILE_WEATHER_DEADLINE = float(os.environ.get('PROFILE_WEATHER_DEADLINE', 8))
+
+# Seconds to wait on the primary weather source before hedging to the
+# secondary, until enough latencies are recorded to use their p95
+
+WEATHER_HEDGE_DELAY = float(os.environ.get('WEATHER_HEDGE_DELAY', 2.0))
+
+# Directory for the on-disk cache of raw weather pages, revalidated with
+# conditional GETs; empty disables it
+
+SCRAPE_HTTP_CACHE_DIR = os.environ.get('SCRAPE_HTTP_CACHE_DIR', '')
+
+# Weather caching (seconds / entries)
+
+WEATHER_FORECAST_TTL = int(os.environ.get('WEATHER_FORECAST_TTL', 30 * 60))
+
+WEATHER_HISTORIC_TTL = int(
+    os.environ.get('WEATHER_HISTORIC_TTL', 24 * 60 * 60))
+
+WEATHER_CACHE_SIZE = int(os.environ.get('WEATHER_CACHE_SIZE', 4096))
+
+# How long unknown ZIPs / "Unknown address" pages are remembered
+
+WEATHER_NEGATIVE_TTL = int(os.environ.get('WEATHER_NEGATIVE_TTL', 60 * 60))
+
+# Coalesce concurrent refreshes across processes by locking the WeatherInfo row
+
+WEATHER_DB_SINGLE_FLIGHT = strtobool(
+    os.environ.get('WEATHER_DB_SINGLE_FLIGHT', 'False'))
+
+# Render the last stored weather on /profile and refresh it in the background
+# once it is older than WEATHER_REFRESH_AFTER seconds
+
+PROFILE_STALE_WHILE_REVALIDATE = strtobool(
+    os.environ.get('PROFILE_STALE_WHILE_REVALIDATE', 'False'))
+
+WEATHER_REFRESH_AFTER = int(os.environ.get('WEATHER_REFRESH_AFTER', 30 * 60))
+
+WEATHER_REFRESH_WORKERS = int(os.environ.get('WEATHER_REFRESH_WORKERS', 2))
+
+# Load every supported country's postal dataset when the app starts
+
+GEOCODER_WARM_UP = strtobool(os.environ.get('GEOCODER_WARM_UP', 'False'))
+
+# Memory-mapped postal code index (see `manage.py build_postal_index`).
+# With GEOCODER_OFFLINE the geocoder only reads this bundle and never
+# downloads country files through pgeocode.
+
+POSTAL_INDEX_DIR = os.environ.get(
+    'POSTAL_INDEX_DIR', os.path.join(BASE_DIR, 'postal_index'))
+
+GEOCODER_OFFLINE = strtobool(os.environ.get('GEOCODER_OFFLINE', 'False'))
+
+# Places fetched at once by WeatherSource.get_many
+
+WEATHER_BATCH_CONCURRENCY = int(os.environ.get('WEATHER_BATCH_CONCURRENCY', 8))
+
+# Serve /profile from the async view (run under ASGI, see at2p/asgi.py)
+
+PROFILE_ASYNC = strtobool(os.environ.get('PROFILE_ASYNC', 'False'))
+
+# Nearby ZIP codes share weather: coordinates are snapped to the centre of a
+# grid cell this many degrees wide before scraping and caching (0 disables)
+
+WEATHER_GRID_PRECISION = float(os.environ.get('WEATHER_GRID_PRECISION', 0.1))
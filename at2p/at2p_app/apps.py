@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class At2PAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'at2p_app'
+
+    def ready(self) -> None:
+        if getattr(settings, 'GEOCODER_WARM_UP', False):
+            from .geocode import warm_up_in_background
+            warm_up_in_background()
@@ -0,0 +1,54 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .data_source.scheduler import BACKGROUND, priority
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "WEATHER_REFRESH_WORKERS", 2),
+    thread_name_prefix="weather-refresh",
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def enqueue_refresh(weather_pk: int) -> bool:
+    with _pending_lock:
+        if weather_pk in _pending:
+            return False
+        _pending.add(weather_pk)
+    _executor.submit(_refresh, weather_pk)
+    return True
+
+
+def pending() -> int:
+    with _pending_lock:
+        return len(_pending)
+
+
+def refresh_weather(weather_pk: int) -> None:
+    from .models import CropScore, WeatherInfo
+
+    w = WeatherInfo.objects.get(pk=weather_pk)
+    w.update_weather()
+    # Changed weather rescores in update_weather; this catches crops
+    # planted since the last refresh
+    CropScore.update_scores(w)
+
+
+def _refresh(weather_pk: int) -> None:
+    close_old_connections()
+    try:
+        with priority(BACKGROUND):
+            refresh_weather(weather_pk)
+    except Exception:
+        logger.exception("Background weather refresh failed (%s)", weather_pk)
+    finally:
+        with _pending_lock:
+            _pending.discard(weather_pk)
+        close_old_connections()
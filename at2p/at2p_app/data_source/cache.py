@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from at2p_app.data_source.deadline import enforced, remaining
+from at2p_app.data_source.parallel import run_parallel
+from at2p_app.data_source.singleflight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    async_weather_flight,
+    weather_flight,
+)
+from django.conf import settings
+
+DEFAULT_FORECAST_TTL = 30 * 60
+DEFAULT_HISTORIC_TTL = 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 60 * 60
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if ttl < 0:
+            raise ValueError("ttl may not be negative")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stored_at(self, key):
+        # When a live entry was set; doesn't count as a hit or miss
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return datetime.fromtimestamp(entry[2], timezone.utc)
+
+    def get_or_set(self, key, fetch):
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            self.set(key, value)
+        return value
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+forecast_cache = TTLCache(
+    _setting("WEATHER_FORECAST_TTL", DEFAULT_FORECAST_TTL),
+    _setting("WEATHER_CACHE_SIZE", DEFAULT_MAX_ENTRIES),
+)
+historic_cache = TTLCache(
+    _setting("WEATHER_HISTORIC_TTL", DEFAULT_HISTORIC_TTL),
+    _setting("WEATHER_CACHE_SIZE", DEFAULT_MAX_ENTRIES),
+)
+
+negative_cache = TTLCache(
+    _setting("WEATHER_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL),
+    _setting("WEATHER_CACHE_SIZE", DEFAULT_MAX_ENTRIES),
+)
+
+
+def cached_weather(
+    key,
+    historic,
+    forecast,
+    historic_store: TTLCache = historic_cache,
+    forecast_store: TTLCache = forecast_cache,
+    flight: SingleFlight = weather_flight,
+):
+    avg = historic_store.get(key)
+    high_low = forecast_store.get(key)
+    if avg is not None and high_low is not None:
+        return avg, high_low
+    with enforced(key):
+        return flight.do(
+            key,
+            lambda: _fetch_weather(
+                key,
+                avg,
+                high_low,
+                historic,
+                forecast,
+                historic_store,
+                forecast_store,
+            ),
+            remaining(),
+        )
+
+
+def _fetch_weather(
+    key, avg, high_low, historic, forecast, historic_store, forecast_store
+):
+    if avg is None and high_low is None:
+        avg, high_low = run_parallel(historic, forecast)
+        historic_store.set(key, avg)
+        forecast_store.set(key, high_low)
+    elif avg is None:
+        avg = historic()
+        historic_store.set(key, avg)
+    else:
+        high_low = forecast()
+        forecast_store.set(key, high_low)
+    return avg, high_low
+
+
+async def acached_weather(
+    key,
+    historic,
+    forecast,
+    historic_store: TTLCache = historic_cache,
+    forecast_store: TTLCache = forecast_cache,
+    flight: AsyncSingleFlight = async_weather_flight,
+):
+    avg = historic_store.get(key)
+    high_low = forecast_store.get(key)
+    if avg is not None and high_low is not None:
+        return avg, high_low
+    with enforced(key):
+        return await flight.do(
+            key,
+            lambda: _afetch_weather(
+                key,
+                avg,
+                high_low,
+                historic,
+                forecast,
+                historic_store,
+                forecast_store,
+            ),
+            remaining(),
+        )
+
+
+async def _afetch_weather(
+    key, avg, high_low, historic, forecast, historic_store, forecast_store
+):
+    if avg is None and high_low is None:
+        avg, high_low = await asyncio.gather(historic(), forecast())
+        historic_store.set(key, avg)
+        forecast_store.set(key, high_low)
+    elif avg is None:
+        avg = await historic()
+        historic_store.set(key, avg)
+    else:
+        high_low = await forecast()
+        forecast_store.set(key, high_low)
+    return avg, high_low
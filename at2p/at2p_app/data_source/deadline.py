@@ -0,0 +1,89 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+import httpx
+import requests
+from at2p_app.domain.common.error import DeadlineError
+
+# Neither futures nor asyncio timeouts are the builtin before Python 3.11
+TIMEOUTS = (
+    TimeoutError,
+    concurrent.futures.TimeoutError,
+    asyncio.TimeoutError,
+    requests.Timeout,
+    httpx.TimeoutException,
+)
+
+_expires = ContextVar("weather_deadline", default=None)
+_cancelled = ContextVar("weather_cancelled", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    if not seconds:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _expires.get()
+    if current is not None:
+        expires = min(expires, current)
+    token = _expires.set(expires)
+    try:
+        yield
+    finally:
+        _expires.reset(token)
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    token = _cancelled.set(event)
+    try:
+        yield
+    finally:
+        _cancelled.reset(token)
+
+
+def remaining() -> Optional[float]:
+    expires = _expires.get()
+    if expires is None:
+        return None
+    return max(0.0, expires - time.monotonic())
+
+
+def check(location=None) -> None:
+    if remaining() == 0:
+        raise DeadlineError(location)
+    event = _cancelled.get()
+    if event is not None and event.is_set():
+        raise DeadlineError(location, "Weather request cancelled")
+
+
+def bounded(timeout, location=None):
+    check(location)
+    left = remaining()
+    if left is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return left if timeout is None else min(timeout, left)
+
+
+@contextmanager
+def enforced(location=None):
+    try:
+        yield
+    except TIMEOUTS as e:
+        if _expires.get() is None:
+            raise
+        raise DeadlineError(location) from e
+
+
+def until_deadline(chunks: Iterable[bytes], location=None) -> Iterator[bytes]:
+    for chunk in chunks:
+        check(location)
+        yield chunk
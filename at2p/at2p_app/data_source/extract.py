@@ -0,0 +1,141 @@
+import asyncio
+import re
+from typing import Iterable, NamedTuple
+
+from at2p_app.data_source.cache import negative_cache
+from at2p_app.data_source.deadline import enforced, until_deadline
+from at2p_app.data_source.http_cache import (
+    body_digest,
+    parse_memo,
+    response_cache,
+)
+from at2p_app.data_source.session import afetch, fetch
+from at2p_app.domain.common.error import WeatherError
+from django.core.exceptions import ValidationError
+from lxml import etree
+
+CHUNK_SIZE = 16 * 1024
+UNKNOWN_ADDRESS = "Scraping error: address not found."
+
+
+class ForecastRange(NamedTuple):
+    high: int
+    low: int
+
+
+def fetch_and_extract(url: str, extractor):
+    check_known_address(url)
+    with enforced(url):
+        return _fetch_and_extract(url, extractor)
+
+
+def _fetch_and_extract(url: str, extractor):
+    if response_cache is not None:
+        cached = response_cache.get(url)
+        headers = cached.conditional_headers() if cached else {}
+        with fetch(url, headers=headers) as response:
+            return _extract_cached(url, extractor, response, cached)
+    with fetch(url, stream=True) as response:
+        chunks = until_deadline(response.iter_content(CHUNK_SIZE), url)
+        # Closing drops the unread rest of the page along with the
+        # connection; that is cheaper than downloading it to reuse one
+        return _remember_unknown(url, extractor, chunks)
+
+
+async def afetch_and_extract(url: str, extractor):
+    check_known_address(url)
+    with enforced(url):
+        cached, kwargs = None, {}
+        if response_cache is not None:
+            cached = await asyncio.to_thread(response_cache.get, url)
+            if cached is not None:
+                kwargs["headers"] = cached.conditional_headers()
+        response = await afetch(url, **kwargs)
+        if response_cache is not None:
+            return await asyncio.to_thread(
+                _extract_cached, url, extractor, response, cached
+            )
+        chunks = until_deadline([response.content], url)
+        return await asyncio.to_thread(
+            _remember_unknown, url, extractor, chunks
+        )
+
+
+def _extract_cached(url: str, extractor, response, cached):
+    if response.status_code == 304 and cached is not None:
+        body, digest = cached.body, cached.digest
+    else:
+        body = response.content
+        digest = body_digest(body)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            response_cache.store(url, body, etag, last_modified)
+    return parse_memo.get_or_set(
+        (extractor.__name__, digest),
+        lambda: _remember_unknown(url, extractor, until_deadline([body], url)),
+    )
+
+
+def address_key(url: str) -> str:
+    # /historic and /ext pages of one location share a negative entry
+    return url.rsplit("/", 1)[0]
+
+
+def check_known_address(url: str) -> None:
+    if negative_cache.get(address_key(url)):
+        raise ValidationError(UNKNOWN_ADDRESS)
+
+
+def _remember_unknown(url: str, extractor, chunks):
+    try:
+        return extractor(chunks, url)
+    except ValidationError:
+        negative_cache.set(address_key(url), True)
+        raise
+
+
+def extract_historic(chunks: Iterable[bytes], url: str = None) -> int:
+    for el in _elements(chunks, ("tr",)):
+        if "sep-t" in el.get("class", "").split():
+            cells = el.findall("td")
+            return int(re.findall(r"\d+", _text(cells[0]))[0])
+    raise WeatherError(url, "Scraping error: historic average not found.")
+
+
+def extract_forecast(
+    chunks: Iterable[bytes], url: str = None
+) -> ForecastRange:
+    for el in _elements(chunks, ("table",)):
+        if el.get("id") != "wt-ext":
+            continue
+        highs, lows = [], []
+        for row in el.iterfind("tbody/tr"):
+            cells = row.findall("td")
+            temps = re.findall(r"\d+", _text(cells[1]))
+            highs.append(int(temps[0]))
+            lows.append(int(temps[1]))
+        if not highs:
+            break
+        return ForecastRange(max(highs), min(lows))
+    raise WeatherError(url, "Scraping error: forecast table not found.")
+
+
+def _elements(chunks: Iterable[bytes], tags: tuple):
+    parser = etree.HTMLPullParser(events=("end",), tag=("title",) + tags)
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, el in parser.read_events():
+            if el.tag == "title":
+                if "Unknown address" in _text(el):
+                    raise ValidationError(UNKNOWN_ADDRESS)
+                continue
+            yield el
+    parser.close()
+    for _, el in parser.read_events():
+        if el.tag != "title":
+            yield el
+
+
+def _text(el) -> str:
+    return "".join(el.itertext())
@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from at2p_app.data_source.cache import DEFAULT_HISTORIC_TTL, TTLCache
+from django.conf import settings
+
+PARSE_MEMO_SIZE = 1024
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    digest: str
+    stored: float
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, directory) -> None:
+        self.directory = Path(directory)
+
+    def path(self, url: str) -> Path:
+        name = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f"{name}.gz"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        try:
+            data = gzip.decompress(self.path(url).read_bytes())
+        except (OSError, EOFError):
+            return None
+        header, _, body = data.partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            return None
+        if meta.get("url") != url:
+            return None
+        return CachedResponse(
+            body,
+            meta.get("etag"),
+            meta.get("last_modified"),
+            body_digest(body),
+            meta.get("stored", 0),
+        )
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: str = None,
+        last_modified: str = None,
+    ) -> CachedResponse:
+        stored = time.time()
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored": stored,
+        }
+        data = gzip.compress(json.dumps(meta).encode() + b"\n" + body)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(url))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return CachedResponse(
+            body, etag, last_modified, body_digest(body), stored
+        )
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.gz"):
+            path.unlink()
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def _response_cache() -> Optional[ResponseCache]:
+    directory = getattr(settings, "SCRAPE_HTTP_CACHE_DIR", "")
+    if not directory:
+        return None
+    return ResponseCache(directory)
+
+
+response_cache = _response_cache()
+# Parsed results keyed by (extractor, body digest): unchanged pages are
+# never parsed twice
+parse_memo = TTLCache(DEFAULT_HISTORIC_TTL, PARSE_MEMO_SIZE)
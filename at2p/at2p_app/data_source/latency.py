@@ -0,0 +1,26 @@
+import math
+import threading
+from collections import deque
+
+DEFAULT_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class LatencyWindow:
+    def __init__(self, size: int = DEFAULT_WINDOW) -> None:
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, default: float = None) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return default
+        return samples[max(0, math.ceil(q * len(samples)) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
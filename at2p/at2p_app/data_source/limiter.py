@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from at2p_app.data_source.scheduler import AsyncWaiters, current_priority
+from django.conf import settings
+
+DEFAULT_INITIAL = 4
+DEFAULT_MIN = 1
+DEFAULT_MAX = 32
+DEFAULT_LATENCY_TARGET = 2.0
+BACKOFF = 0.5
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: float = DEFAULT_INITIAL,
+        minimum: float = DEFAULT_MIN,
+        maximum: float = DEFAULT_MAX,
+        latency_target: float = DEFAULT_LATENCY_TARGET,
+    ) -> None:
+        if not minimum <= initial <= maximum:
+            raise ValueError("initial limit must be between min and max")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.limit = float(initial)
+        self.in_flight = 0
+        self._last_backoff = float("-inf")
+        self._waiting = Counter()
+        self._cond = threading.Condition()
+        self._async_waiters = AsyncWaiters()
+
+    def acquire(self, timeout: float = None, level: int = None) -> float:
+        if level is None:
+            level = current_priority()
+        with self._cond:
+            self._waiting[level] += 1
+            try:
+                ready = self._cond.wait_for(
+                    lambda: self._may_enter(level), timeout
+                )
+            finally:
+                self._waiting[level] -= 1
+            if not ready:
+                # A lower priority waiter may have been held back by us
+                self._notify()
+                raise TimeoutError("Timed out waiting for a scrape slot")
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def aacquire(self, timeout: float = None, level: int = None):
+        # The slot is taken on the event loop, so a cancelled caller can
+        # never hold one it does not know about
+        if level is None:
+            level = current_priority()
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting[level] += 1
+            waiter = self._async_waiters.add()
+        try:
+            while True:
+                waiter[1].clear()
+                with self._cond:
+                    if self._may_enter(level):
+                        self.in_flight += 1
+                        return time.monotonic()
+                delay = None
+                if expires is not None:
+                    delay = expires - time.monotonic()
+                    if delay <= 0:
+                        raise TimeoutError(
+                            "Timed out waiting for a scrape slot"
+                        )
+                await self._async_waiters.wait(waiter, delay)
+        finally:
+            with self._cond:
+                self._waiting[level] -= 1
+                self._async_waiters.discard(waiter)
+                self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        self._async_waiters.notify_all()
+
+    def _may_enter(self, level: int) -> bool:
+        # Free slots go to the most urgent waiters first
+        return self.in_flight < int(self.limit) and not any(
+            count for other, count in self._waiting.items() if other < level
+        )
+
+    def release(self, started: float, ok: bool = True) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            if ok is None:
+                # The request never went out, so there is nothing to learn
+                self._notify()
+                return
+            # Additive increase of ~1 per window of completions; halve on
+            # a slow or failed request, at most once per latency target
+            if ok and now - started <= self.latency_target:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif now - self._last_backoff >= self.latency_target:
+                self.limit = max(self.minimum, self.limit * BACKOFF)
+                self._last_backoff = now
+            self._notify()
+
+    @contextmanager
+    def slot(self):
+        started = self.acquire()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release(started, ok)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": sum(self._waiting.values()),
+            }
+
+
+def overloaded(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+scrape_limiter = AdaptiveLimiter(
+    getattr(settings, "SCRAPE_CONCURRENCY_INITIAL", DEFAULT_INITIAL),
+    getattr(settings, "SCRAPE_CONCURRENCY_MIN", DEFAULT_MIN),
+    getattr(settings, "SCRAPE_CONCURRENCY_MAX", DEFAULT_MAX),
+    getattr(settings, "SCRAPE_LATENCY_TARGET", DEFAULT_LATENCY_TARGET),
+)
@@ -0,0 +1,19 @@
+import contextvars
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+
+def run_parallel(*calls) -> list:
+    executor = ThreadPoolExecutor(max_workers=len(calls))
+    try:
+        futures = [
+            executor.submit(contextvars.copy_context().run, call)
+            for call in calls
+        ]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+    finally:
+        # Don't hold a failure back until the slower sibling finishes
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+INTERACTIVE = 0
+BACKGROUND = 10
+
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+
+_priority = ContextVar("scrape_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AsyncWaiters:
+    # Wakes coroutines waiting on state guarded by a threading lock; all
+    # calls but wait() are made with that lock held
+
+    def __init__(self) -> None:
+        self._waiters = set()
+
+    def add(self) -> tuple:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        self._waiters.add(waiter)
+        return waiter
+
+    def discard(self, waiter: tuple) -> None:
+        self._waiters.discard(waiter)
+
+    def notify_all(self) -> None:
+        for loop, event in self._waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    @staticmethod
+    async def wait(waiter: tuple, timeout: float = None) -> None:
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class OutboundScheduler:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._queues = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._async_waiters = AsyncWaiters()
+        self._granted = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, host: str, level: int = None, timeout: float = None):
+        if not self.rate:
+            return 0.0
+        if level is None:
+            level = current_priority()
+        start = time.monotonic()
+        ticket = (level, next(self._seq))
+        with self._cond:
+            queue = self._enqueue(host, ticket)
+            try:
+                while True:
+                    delay = self._try_turn(host, queue, ticket)
+                    if delay == 0:
+                        return self._record_grant(start)
+                    delay = self._bound(host, delay, start, timeout)
+                    self._cond.wait(delay)
+            except BaseException:
+                self._leave(queue, ticket)
+                raise
+
+    async def aacquire(
+        self, host: str, level: int = None, timeout: float = None
+    ):
+        # Same queue as acquire, but waits on the event loop instead of
+        # holding a thread for the whole token wait
+        if not self.rate:
+            return 0.0
+        if level is None:
+            level = current_priority()
+        start = time.monotonic()
+        ticket = (level, next(self._seq))
+        with self._cond:
+            queue = self._enqueue(host, ticket)
+            waiter = self._async_waiters.add()
+        try:
+            while True:
+                waiter[1].clear()
+                with self._cond:
+                    delay = self._try_turn(host, queue, ticket)
+                    if delay == 0:
+                        return self._record_grant(start)
+                    delay = self._bound(host, delay, start, timeout)
+                await self._async_waiters.wait(waiter, delay)
+        except BaseException:
+            with self._cond:
+                self._leave(queue, ticket)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def _enqueue(self, host, ticket) -> list:
+        queue = self._queues.setdefault(host, [])
+        heapq.heappush(queue, ticket)
+        return queue
+
+    def _leave(self, queue, ticket) -> None:
+        if ticket in queue:
+            queue.remove(ticket)
+            heapq.heapify(queue)
+        self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        self._async_waiters.notify_all()
+
+    def _try_turn(self, host, queue, ticket):
+        # 0 once granted, the token wait at the head, None behind it
+        if queue[0] != ticket:
+            return None
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[host] = bucket
+        delay = bucket.take()
+        if delay == 0:
+            heapq.heappop(queue)
+            self._notify()
+        return delay
+
+    @staticmethod
+    def _bound(host, delay, start, timeout):
+        if timeout is None:
+            return delay
+        remaining = start + timeout - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out waiting to request {host}")
+        return remaining if delay is None else min(delay, remaining)
+
+    def _record_grant(self, start) -> float:
+        waited = time.monotonic() - start
+        self._granted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return waited
+
+    def queue_depth(self, host: str = None) -> int:
+        with self._cond:
+            if host is not None:
+                return len(self._queues.get(host, []))
+            return sum(len(q) for q in self._queues.values())
+
+    def stats(self) -> dict:
+        with self._cond:
+            granted = self._granted
+            return {
+                "queue_depth": sum(len(q) for q in self._queues.values()),
+                "granted": granted,
+                "avg_wait": self._wait_total / granted if granted else 0.0,
+                "max_wait": self._wait_max,
+            }
+
+
+scheduler = OutboundScheduler(
+    getattr(settings, "SCRAPE_RATE_LIMIT", DEFAULT_RATE),
+    getattr(settings, "SCRAPE_RATE_BURST", DEFAULT_BURST),
+)
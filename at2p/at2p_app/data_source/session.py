@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from at2p_app.data_source.deadline import bounded, remaining
+from at2p_app.data_source.limiter import overloaded, scrape_limiter
+from at2p_app.data_source.scheduler import current_priority, scheduler
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+
+def close_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def timeout() -> tuple:
+    connect = getattr(
+        settings, "SCRAPE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT
+    )
+    read = getattr(settings, "SCRAPE_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+    return (connect, read)
+
+
+def fetch(url: str, **kwargs) -> requests.Response:
+    scheduler.acquire(urlsplit(url).hostname, timeout=remaining())
+    # The slot covers only the upstream round trip: callers stream and
+    # parse the body after the limiter has seen its latency
+    started = scrape_limiter.acquire(remaining())
+    ok = None
+    try:
+        # Bound once both queues are behind us so neither wait is granted
+        # twice; running out here is not the upstream's fault
+        kwargs["timeout"] = bounded(kwargs.get("timeout", timeout()), url)
+        ok = False
+        response = get_session().get(url, **kwargs)
+        ok = not overloaded(response.status_code)
+    finally:
+        scrape_limiter.release(started, ok)
+    return response
+
+
+def _new_session() -> requests.Session:
+    pool_size = getattr(settings, "SCRAPE_POOL_SIZE", DEFAULT_POOL_SIZE)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+    )
+    return session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    # httpx clients are bound to the event loop they were first used on
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _new_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+async def afetch(url: str, **kwargs) -> httpx.Response:
+    await scheduler.aacquire(
+        urlsplit(url).hostname, current_priority(), remaining()
+    )
+    started = await scrape_limiter.aacquire(remaining(), current_priority())
+    ok = None
+    try:
+        if remaining() is not None:
+            kwargs["timeout"] = bounded(kwargs.get("timeout"), url)
+        ok = False
+        response = await get_async_client().get(url, **kwargs)
+        ok = not overloaded(response.status_code)
+    finally:
+        scrape_limiter.release(started, ok)
+    return response
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    pool_size = getattr(settings, "SCRAPE_POOL_SIZE", DEFAULT_POOL_SIZE)
+    connect, read = timeout()
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(read, connect=connect),
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+        headers={"Accept-Encoding": "gzip, deflate"},
+        follow_redirects=True,
+    )
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fetch, timeout: float = None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self._calls[key] = call
+        if not leader:
+            return call.result(timeout)
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    def __init__(self) -> None:
+        # Tasks belong to one event loop, so calls are tracked per loop
+        self._calls = weakref.WeakKeyDictionary()
+
+    async def do(self, key, fetch, timeout: float = None):
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            calls[key] = task
+
+            def forget(done):
+                if calls.get(key) is done:
+                    del calls[key]
+
+            task.add_done_callback(forget)
+        # A cancelled or timed-out waiter must not cancel the shared fetch
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def in_flight(self) -> int:
+        return sum(len(calls) for calls in self._calls.values())
+
+
+weather_flight = SingleFlight()
+async_weather_flight = AsyncSingleFlight()
@@ -1,15 +1,49 @@
-import re
+import asyncio
+import contextvars
+import threading
+import time
 from abc import ABC, abstractclassmethod, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from typing import Iterable, Iterator, NamedTuple
 
-import numpy as np
-import requests
+from at2p_app.data_source.cache import (
+    TTLCache,
+    acached_weather,
+    cached_weather,
+    forecast_cache,
+    historic_cache,
+)
+from at2p_app.data_source.extract import (
+    afetch_and_extract,
+    extract_forecast,
+    extract_historic,
+    fetch_and_extract,
+)
+from at2p_app.data_source.deadline import cancellable
+from at2p_app.data_source.latency import LatencyWindow
+from at2p_app.data_source.parallel import run_parallel
+from at2p_app.data_source.scheduler import BACKGROUND, priority
 from at2p_app.domain.common.error import WeatherError
 from at2p_app.domain.entities.place import Place
 from at2p_app.domain.value_objects.temperature import Temperature
 from at2p_app.domain.value_objects.weather import Weather
-from bs4 import BeautifulSoup
-from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_BATCH_CONCURRENCY = 8
+DEFAULT_HEDGE_DELAY = 2.0
+HEDGE_PERCENTILE = 0.95
+
+
+class WeatherResult(NamedTuple):
+    place: Place
+    weather: Weather = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class WeatherSource(ABC):
@@ -27,17 +61,71 @@ class WeatherSource(ABC):
     def get(self):
         pass
 
+    @abstractmethod
+    def historic_temp(self):
+        pass
+
+    @abstractmethod
+    def forecast_high_low(self):
+        pass
+
+    @classmethod
+    def get_many(
+        cls, places: Iterable[Place], max_workers: int = None
+    ) -> Iterator[WeatherResult]:
+        if max_workers is None:
+            max_workers = getattr(
+                settings,
+                "WEATHER_BATCH_CONCURRENCY",
+                DEFAULT_BATCH_CONCURRENCY,
+            )
+        places = iter(unique_places(places))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            while True:
+                for place in places:
+                    future = executor.submit(
+                        contextvars.copy_context().run, cls._get_one, place
+                    )
+                    pending[future] = place
+                    if len(pending) >= max_workers:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    place = pending.pop(future)
+                    try:
+                        yield WeatherResult(place, future.result())
+                    except Exception as e:
+                        yield WeatherResult(place, error=e)
+
+    @classmethod
+    def _get_one(cls, place: Place) -> Weather:
+        with priority(BACKGROUND):
+            return cls.new(place).get()
+
+
+def unique_places(places: Iterable[Place]) -> Iterator[Place]:
+    seen = set()
+    for place in places:
+        key = (place.country.code, place.zip_code.zip)
+        if key not in seen:
+            seen.add(key)
+            yield place
+
 
 @dataclass
 class WeatherScraper(WeatherSource):
 
     _place: Place
     _url_prefix: str = "https://www.timeanddate.com/weather/@z-"
+    _concurrent: bool = True
 
     @classmethod
-    def new(cls, place: Place):
+    def new(cls, place: Place, concurrent: bool = True):
         cls._validate(place)
-        return cls(place)
+        return cls(place, _concurrent=concurrent)
 
     @classmethod
     def _validate(cls, place: Place):
@@ -50,45 +138,240 @@ class WeatherScraper(WeatherSource):
             return WeatherError
 
     def get(self):
-        avg = self.historic_temp()
-        high, low = self.forecast_high_low()
+        if self._concurrent:
+            avg, (high, low) = run_parallel(
+                self.historic_temp, self.forecast_high_low
+            )
+        else:
+            avg = self.historic_temp()
+            high, low = self.forecast_high_low()
         weather_report = Weather.new(self._place.id, high, low, avg)
         return weather_report
 
     def historic_temp(self) -> Temperature:
         url = self.weather_url("historic")
-        soup = self.get_soup(url)
-        row = soup.find("tr", {"class": "sep-t"})
-        cells = row.find_all("td")
-        historic_temp = int(re.findall(r"\d+", cells[0].text)[0])
-        return Temperature.new(historic_temp)
+        avg = fetch_and_extract(url, extract_historic)
+        return Temperature.new(avg)
 
     def forecast_high_low(self) -> Temperature:
         url = self.weather_url("ext")
-        soup = self.get_soup(url)
-        forecast_table = soup.find("table", id="wt-ext")
-        table_body = forecast_table.find("tbody")
-        rows = table_body.find_all("tr")
-        data = []
-        for row in rows:
-            cells = row.find_all("td")
-            temps = re.findall(r"\d+", cells[1].text)
-            data.append(list((int(temps[0]), int(temps[1]))))
-        data_t = np.transpose(data)
-        high = np.max(data_t[0])
-        low = np.min(data_t[1])
-        return Temperature.new(int(high)), Temperature.new(int(low))
-
-    def get_soup(self, url) -> BeautifulSoup:
-        page = requests.get(url)
-        soup = BeautifulSoup(page.content, "lxml")
-        head_tag = soup.head
-        title = head_tag.title
-        if "Unknown address" in title.contents[0]:
-            raise ValidationError("Scraping error: address not found.")
-        return soup
+        high, low = fetch_and_extract(url, extract_forecast)
+        return Temperature.new(high), Temperature.new(low)
 
     def weather_url(self, type_postfix: str):
         country = self._place.country.code
         zip_code = self._place.zip_code.zip
         return f"{self._url_prefix}{country.lower()}-{zip_code}/{type_postfix}"
+
+
+@dataclass
+class AsyncWeatherScraper(WeatherScraper):
+    async def aget(self) -> Weather:
+        avg, (high, low) = await asyncio.gather(
+            self.ahistoric_temp(), self.aforecast_high_low()
+        )
+        return Weather.new(self._place.id, high, low, avg)
+
+    async def ahistoric_temp(self) -> Temperature:
+        url = self.weather_url("historic")
+        avg = await afetch_and_extract(url, extract_historic)
+        return Temperature.new(avg)
+
+    async def aforecast_high_low(self) -> Temperature:
+        url = self.weather_url("ext")
+        high, low = await afetch_and_extract(url, extract_forecast)
+        return Temperature.new(high), Temperature.new(low)
+
+
+@dataclass
+class CachedWeatherSource(WeatherSource):
+
+    _place: Place
+    _source: WeatherSource
+    _historic_cache: TTLCache = historic_cache
+    _forecast_cache: TTLCache = forecast_cache
+
+    @classmethod
+    def new(cls, place: Place, source: type = AsyncWeatherScraper):
+        cls._validate(place)
+        return cls(place, source.new(place))
+
+    @classmethod
+    def _validate(cls, place: Place):
+        if not isinstance(place, Place):
+            error_msg = "place must be an instance of Place"
+            raise WeatherError(place, error_msg)
+
+    def get(self):
+        avg, (high, low) = cached_weather(
+            self._key(),
+            self._source.historic_temp,
+            self._source.forecast_high_low,
+            self._historic_cache,
+            self._forecast_cache,
+        )
+        return Weather.new(self._place.id, high, low, avg)
+
+    def historic_temp(self) -> Temperature:
+        return self._historic_cache.get_or_set(
+            self._key(), self._source.historic_temp
+        )
+
+    def forecast_high_low(self) -> Temperature:
+        return self._forecast_cache.get_or_set(
+            self._key(), self._source.forecast_high_low
+        )
+
+    def _key(self):
+        return (self._place.country.code, self._place.zip_code.zip)
+
+    async def aget(self) -> Weather:
+        avg, (high, low) = await acached_weather(
+            self._key(),
+            self._source.ahistoric_temp,
+            self._source.aforecast_high_low,
+            self._historic_cache,
+            self._forecast_cache,
+        )
+        return Weather.new(self._place.id, high, low, avg)
+
+
+@dataclass
+class StoredWeatherSource(WeatherSource):
+
+    _place: Place
+
+    @classmethod
+    def new(cls, place: Place):
+        cls._validate(place)
+        return cls(place)
+
+    @classmethod
+    def _validate(cls, place: Place):
+        if not isinstance(place, Place):
+            error_msg = "place must be an instance of Place"
+            raise WeatherError(place, error_msg)
+
+    def get(self) -> Weather:
+        avg, high, low = self._stored()
+        return Weather.new(
+            self._place.id,
+            Temperature.new(high),
+            Temperature.new(low),
+            Temperature.new(avg),
+        )
+
+    def historic_temp(self) -> Temperature:
+        return Temperature.new(self._stored()[0])
+
+    def forecast_high_low(self) -> Temperature:
+        _, high, low = self._stored()
+        return Temperature.new(high), Temperature.new(low)
+
+    def _stored(self) -> tuple:
+        # Imported here: models depends on the data_source package
+        from at2p_app.models import WeatherInfo
+
+        row = (
+            WeatherInfo.objects.filter(
+                country=self._place.country.code,
+                zip=self._place.zip_code.zip,
+                weather_updated_on__isnull=False,
+            )
+            .values_list(*WeatherInfo.weather_fields)
+            .first()
+        )
+        if row is None or None in row:
+            raise WeatherError(self._place, "No stored weather for place")
+        return row
+
+
+hedge_latency = LatencyWindow()
+
+
+@dataclass
+class HedgedWeatherSource(WeatherSource):
+
+    _place: Place
+    _primary: WeatherSource
+    _secondary: WeatherSource
+    _latency: LatencyWindow = hedge_latency
+
+    @classmethod
+    def new(
+        cls,
+        place: Place,
+        primary: type = WeatherScraper,
+        secondary: type = StoredWeatherSource,
+    ):
+        cls._validate(place)
+        return cls(place, primary.new(place), secondary.new(place))
+
+    @classmethod
+    def _validate(cls, place: Place):
+        if not isinstance(place, Place):
+            error_msg = "place must be an instance of Place"
+            raise WeatherError(place, error_msg)
+
+    def get(self) -> Weather:
+        return self._hedge(lambda source: source.get())
+
+    def historic_temp(self) -> Temperature:
+        return self._hedge(lambda source: source.historic_temp())
+
+    def forecast_high_low(self) -> Temperature:
+        return self._hedge(lambda source: source.forecast_high_low())
+
+    def hedge_delay(self) -> float:
+        default = getattr(settings, "WEATHER_HEDGE_DELAY", DEFAULT_HEDGE_DELAY)
+        return self._latency.percentile(HEDGE_PERCENTILE, default)
+
+    def _hedge(self, call):
+        executor = ThreadPoolExecutor(max_workers=2)
+        cancels = {}
+        try:
+            primary = self._submit(executor, cancels, self._timed, call)
+            done, _ = wait([primary], timeout=self.hedge_delay())
+            if done and primary.exception() is None:
+                return primary.result()
+            self._submit(executor, cancels, call, self._secondary)
+            return self._first_result(cancels)
+        finally:
+            # Whichever source lost stops at its next fetch or parsed chunk
+            for event in cancels.values():
+                event.set()
+            executor.shutdown(wait=False)
+
+    def _submit(self, executor, cancels, fn, *args):
+        event = threading.Event()
+        context = contextvars.copy_context()
+        future = executor.submit(context.run, self._run, event, fn, *args)
+        cancels[future] = event
+        return future
+
+    @staticmethod
+    def _run(event: threading.Event, fn, *args):
+        try:
+            with cancellable(event):
+                return fn(*args)
+        finally:
+            # Hedge threads are per call; drop any connection they opened
+            connections.close_all()
+
+    def _timed(self, call):
+        started = time.monotonic()
+        result = call(self._primary)
+        self._latency.record(time.monotonic() - started)
+        return result
+
+    @staticmethod
+    def _first_result(futures):
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -82,3 +82,10 @@ class ZipCodeError(Exception):
     def __init__(self, code: str, error_msg: str = generic_msg) -> None:
         message = f"\n{error_msg}\nCode: {code}"
         super().__init__(message)
+
+
+class DeadlineError(WeatherError):
+    generic_msg = "Weather deadline exceeded"
+
+    def __init__(self, location, error_msg: str = generic_msg) -> None:
+        super().__init__(location, error_msg)
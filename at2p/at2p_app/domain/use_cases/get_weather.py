@@ -1,6 +1,13 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterable, Iterator
 
-from at2p_app.data_source.weather_source import Place, Weather, WeatherSource
+from at2p_app.data_source.weather_source import (
+    Place,
+    Weather,
+    WeatherResult,
+    WeatherSource,
+)
 from at2p_app.domain.common.error import WeatherError
 
 
@@ -22,3 +29,28 @@ class WeatherRetriever(ABC):
     @abstractmethod
     def get_weather(self, place: Place) -> Weather:
         return self._weather_source.get(place)
+
+    def get_many(
+        self, places: Iterable[Place], max_workers: int = None
+    ) -> Iterator[WeatherResult]:
+        source = type(self._weather_source)
+        return source.get_many(places, max_workers)
+
+
+@dataclass
+class AsyncWeatherRetriever(WeatherRetriever):
+
+    _weather_source: WeatherSource
+
+    @classmethod
+    def _validate(cls, weather_source: WeatherSource):
+        super()._validate(weather_source)
+        if not hasattr(weather_source, "aget"):
+            error_msg = "weather_source must support async access (aget)"
+            raise WeatherError(error_msg)
+
+    def get_weather(self, place: Place) -> Weather:
+        return type(self._weather_source).new(place).get()
+
+    async def aget_weather(self, place: Place) -> Weather:
+        return await type(self._weather_source).new(place).aget()
@@ -0,0 +1,39 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class CropScores(NamedTuple):
+    score: np.ndarray
+    chill: np.ndarray
+    cook: np.ndarray
+    soil: np.ndarray
+    plantable: np.ndarray
+    margin: np.ndarray
+
+
+def score_crops(
+    low: float,
+    high: float,
+    soil: float,
+    min_temp,
+    min_opt_temp,
+    max_opt_temp,
+    max_temp,
+) -> CropScores:
+    mn = np.asarray(min_temp, dtype=float)
+    ol = np.asarray(min_opt_temp, dtype=float)
+    oh = np.asarray(max_opt_temp, dtype=float)
+    mx = np.asarray(max_temp, dtype=float)
+
+    chill = np.maximum(mn - low, 0) / np.maximum(ol - mn, 1)
+    cook = np.maximum(high - mx, 0) / np.maximum(mx - oh, 1)
+    off_opt = np.maximum(np.maximum(soil - oh, 0), np.maximum(ol - soil, 0))
+    sl = off_opt / np.maximum(oh - ol, 1)
+    score = np.round(np.exp(-np.maximum(np.maximum(chill, cook), sl)), 2)
+
+    plantable = (high > ol) & (low < oh) & (low >= mn) & (high <= mx)
+    margin = np.minimum(
+        np.minimum(mx - high, low - mn), np.minimum(oh - soil, soil - ol)
+    )
+    return CropScores(score, chill, cook, sl, plantable, margin)
@@ -1,9 +1,12 @@
 from abc import ABC, abstractclassmethod, abstractmethod
 from dataclasses import dataclass
+from typing import List
 
 from at2p_app.domain.common.error import RecommenderError
 from at2p_app.domain.entities.crop import Crop
+from at2p_app.domain.use_cases.plantability import score_crops
 from at2p_app.domain.value_objects.recommendation import Recommendation
+from at2p_app.domain.value_objects.temperature import Temperature
 from at2p_app.domain.value_objects.weather import Weather
 
 
@@ -38,20 +41,24 @@ class SimpleRecommender(CropRecommender):
         return
 
     def crop(self, crop: Crop) -> Recommendation:
+        return self.crops([crop])[0]
 
-        low = self._weather.low
-        high = self._weather.high
-        avg = self._weather.avg
-
-        abs_max = crop.abs_range.max
-        abs_min = crop.abs_range.min
-        opt_min = crop.opt_range.min
-        opt_max = crop.opt_range.max
-
-        absolute_margin = min(abs_max - high, low - abs_min)
-        optimal_margin = min(opt_max - avg, avg - opt_min)
-        margin = min(absolute_margin, optimal_margin)
-        recommended = margin.temp > 0
-        return Recommendation.new(
-            self._weather.place_id, crop, recommended, margin
+    def crops(self, crops: List[Crop]) -> List[Recommendation]:
+        scores = score_crops(
+            self._weather.low.temp,
+            self._weather.high.temp,
+            self._weather.avg.temp,
+            [c.abs_range.min.temp for c in crops],
+            [c.opt_range.min.temp for c in crops],
+            [c.opt_range.max.temp for c in crops],
+            [c.abs_range.max.temp for c in crops],
         )
+        return [
+            Recommendation.new(
+                self._weather.place_id,
+                crop,
+                bool(margin > 0),
+                Temperature.new(float(margin)),
+            )
+            for crop, margin in zip(crops, scores.margin)
+        ]
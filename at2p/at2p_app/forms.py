@@ -2,7 +2,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.forms import EmailField, ModelForm
 from django.forms import ModelMultipleChoiceField, CheckboxSelectMultiple
 from .models import Planter, Crop
-import pgeocode
+from .geocode import UNKNOWN_POSTAL_CODE, locate
 from django.core.exceptions import ValidationError
 from django_countries.widgets import CountrySelectWidget
 from .static import COUNTRIES_ONLY
@@ -41,10 +41,12 @@ class ProfileForm(ModelForm):
         widgets = {'country': CountrySelectWidget()}
 
     def clean(self) -> None:
-        n = pgeocode.Nominatim(self.data['country'])
-        country = n.query_postal_code(self.data['zip']).country_code
-        if self.data['country'] == country:
-            return
-        else:
+        try:
+            locate(self.data['country'], self.data['zip'])
+        except ValidationError as e:
+            # Anything else, e.g. a country without postal data, is
+            # more useful to the user as is
+            if e.code != UNKNOWN_POSTAL_CODE:
+                raise
             raise ValidationError(
                 "Form error: Country / ZIP combination is invalid.")
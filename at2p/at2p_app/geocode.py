@@ -0,0 +1,116 @@
+import logging
+import math
+import threading
+
+import pgeocode
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from .data_source.cache import negative_cache
+from .postal_index import get_index
+from .static import COUNTRIES_ONLY
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_POSTAL_CODE = "unknown_postal_code"
+MISSING_COUNTRY = "missing_country"
+
+_geocoders = {}
+_country_locks = {}
+_registry_lock = threading.Lock()
+
+
+def offline() -> bool:
+    return getattr(settings, "GEOCODER_OFFLINE", False)
+
+
+def get_geocoder(country: str) -> pgeocode.Nominatim:
+    country = str(country).upper()
+    if offline():
+        raise _missing_country(country)
+    geocoder = _geocoders.get(country)
+    if geocoder is not None:
+        return geocoder
+
+    with _registry_lock:
+        lock = _country_locks.setdefault(country, threading.Lock())
+    with lock:
+        geocoder = _geocoders.get(country)
+        if geocoder is None:
+            geocoder = pgeocode.Nominatim(country)
+            _geocoders[country] = geocoder
+    return geocoder
+
+
+def query_postal_code(country: str, zip: str):
+    index = get_index(country)
+    if index is not None:
+        return index.lookup(zip)
+    return get_geocoder(country).query_postal_code(zip)
+
+
+def locate(country: str, zip: str):
+    country = str(country).upper()
+    key = ("geocode", country, str(zip))
+    if negative_cache.get(key):
+        raise _unknown_postal_code(country, zip)
+    place = query_postal_code(country, zip)
+    if place.country_code != country or _is_nan(place.latitude):
+        negative_cache.set(key, True)
+        raise _unknown_postal_code(country, zip)
+    return place
+
+
+def _is_nan(value) -> bool:
+    try:
+        return math.isnan(float(value))
+    except (TypeError, ValueError):
+        return True
+
+
+def _unknown_postal_code(country: str, zip: str) -> ValidationError:
+    return ValidationError(
+        f"Geocoding error: unknown postal code {zip} for country {country}.",
+        code=UNKNOWN_POSTAL_CODE,
+    )
+
+
+def _missing_country(country: str) -> ValidationError:
+    return ValidationError(
+        f"Geocoding error: no bundled postal data for country {country}. "
+        "Run `manage.py build_postal_index` with a source file for it.",
+        code=MISSING_COUNTRY,
+    )
+
+
+def grid_cell(lat, long, precision: float = None) -> tuple:
+    if precision is None:
+        precision = getattr(settings, "WEATHER_GRID_PRECISION", 0)
+    lat, long = float(lat), float(long)
+    if not precision:
+        return (round(lat, 4), round(long, 4))
+    return (_cell_center(lat, precision), _cell_center(long, precision))
+
+
+def _cell_center(value: float, precision: float) -> float:
+    return round((math.floor(value / precision) + 0.5) * precision, 4)
+
+
+def loaded_countries() -> list:
+    return sorted(_geocoders)
+
+
+def warm_up(countries=COUNTRIES_ONLY) -> None:
+    load = get_index if offline() else get_geocoder
+    for country in countries:
+        try:
+            load(country)
+        except Exception:
+            logger.exception("Could not load postal data for %s", country)
+
+
+def warm_up_in_background(countries=COUNTRIES_ONLY) -> threading.Thread:
+    thread = threading.Thread(
+        target=warm_up, args=(countries,), name="geocoder-warm-up", daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,26 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from at2p_app.models import WeatherInfo
+
+
+class Command(BaseCommand):
+    help = 'Geocode WeatherInfo rows whose lat/long is missing or outdated'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Geocode every row, even ones that look up to date')
+
+    def handle(self, *args, **options):
+        updated = failed = 0
+        for w in WeatherInfo.objects.iterator():
+            if not (options['all'] or w.needs_geocode()):
+                continue
+            try:
+                w.set_lat_and_long()
+            except (ValidationError, ArithmeticError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f'{w}: {e}')
+                continue
+            updated += 1
+        self.stdout.write(f'Geocoded {updated} rows ({failed} failed)')
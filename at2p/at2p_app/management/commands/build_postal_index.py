@@ -0,0 +1,56 @@
+import os
+from datetime import datetime
+
+import pgeocode
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from at2p_app.postal_index import (
+    PostalIndex,
+    activate_bundle,
+    read_postal_file,
+)
+from at2p_app.static import COUNTRIES_ONLY
+
+
+class Command(BaseCommand):
+    help = 'Build a versioned, memory-mapped postal code bundle for geocoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('countries', nargs='*', default=COUNTRIES_ONLY)
+        parser.add_argument(
+            '--source',
+            help='Directory of GeoNames XX.txt / XX.zip files. '
+                 'Without it, data is loaded through pgeocode.')
+        parser.add_argument(
+            '--output', default=settings.POSTAL_INDEX_DIR,
+            help='Bundle root directory')
+        parser.add_argument(
+            '--bundle-version',
+            default=datetime.now().strftime('%Y%m%d%H%M%S'),
+            help='Name of the bundle version to create')
+
+    def handle(self, *args, **options):
+        version = options['bundle_version']
+        directory = os.path.join(options['output'], version)
+        counts = {}
+        for country in options['countries']:
+            try:
+                codes, lats, longs = self.load(country, options['source'])
+            except FileNotFoundError as e:
+                self.stderr.write(f'{country}: skipped ({e})')
+                continue
+            index = PostalIndex.build(country, codes, lats, longs, directory)
+            counts[index.country] = len(index)
+            self.stdout.write(f'{index.country}: {len(index)} postal codes')
+
+        if not counts:
+            raise CommandError('No postal data found; bundle not activated.')
+        activate_bundle(options['output'], version, counts)
+        self.stdout.write(f'Activated postal bundle {version}')
+
+    def load(self, country, source):
+        if source:
+            return read_postal_file(source, country)
+        data = pgeocode.Nominatim(country)._data
+        data = data[data.postal_code.notna()]
+        return data.postal_code, data.latitude, data.longitude
@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from at2p_app.data_source.scheduler import BACKGROUND, priority
+from at2p_app.models import Climatology, WeatherInfo
+from at2p_app.scrape import historic_temp
+
+
+class Command(BaseCommand):
+    help = "Store this month's historic average for every weather cell served"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-scrape cells that already have a stored average')
+        parser.add_argument(
+            '--workers', type=int, default=settings.WEATHER_BATCH_CONCURRENCY,
+            help='Number of pages fetched at once')
+
+    def handle(self, *args, **options):
+        month = timezone.localdate().month
+        cells = set()
+        rows = WeatherInfo.objects.filter(
+            lat__isnull=False, long__isnull=False)
+        for w in rows.iterator():
+            cells.add(w.weather_cell())
+        if not options['force']:
+            cells = {c for c in cells if Climatology.lookup(c, month) is None}
+
+        stored = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(self.fetch, cell): cell for cell in cells
+            }
+            for future in as_completed(futures):
+                cell = futures[future]
+                try:
+                    Climatology.record(cell, future.result(), month)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{cell}: {e}')
+                    continue
+                stored += 1
+        self.stdout.write(
+            f'Stored {stored} historic averages ({failed} failed)')
+
+    def fetch(self, cell):
+        with priority(BACKGROUND):
+            return historic_temp(*cell)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherinfo',
+            name='weather_updated_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
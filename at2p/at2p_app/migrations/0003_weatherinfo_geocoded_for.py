@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0002_weatherinfo_weather_updated_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherinfo',
+            name='geocoded_for',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0003_weatherinfo_geocoded_for'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Climatology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lat', models.DecimalField(decimal_places=4, max_digits=7)),
+                ('long', models.DecimalField(decimal_places=4, max_digits=7)),
+                ('month', models.PositiveSmallIntegerField()),
+                ('avg_temp', models.SmallIntegerField()),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='climatology',
+            constraint=models.UniqueConstraint(fields=('lat', 'long', 'month'), name='unique_cell_month'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0004_climatology'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherinfo',
+            name='weather_checked_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
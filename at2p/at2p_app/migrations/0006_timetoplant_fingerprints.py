@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0005_weatherinfo_weather_checked_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timetoplant',
+            name='scored_crop',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='timetoplant',
+            name='scored_weather',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
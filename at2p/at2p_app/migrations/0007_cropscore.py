@@ -0,0 +1,135 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SCORE_FIELDS = [
+    'plantable',
+    'chill',
+    'cook',
+    'soil',
+    'plantable_score',
+    'scored_weather',
+    'scored_crop',
+]
+
+
+def copy_scores_to_crop_scores(apps, schema_editor):
+    WeatherInfo = apps.get_model('at2p_app', 'WeatherInfo')
+    TimeToPlant = apps.get_model('at2p_app', 'TimeToPlant')
+    CropScore = apps.get_model('at2p_app', 'CropScore')
+    weather = {
+        (country, zip_code): pk
+        for country, zip_code, pk in WeatherInfo.objects.values_list(
+            'country', 'zip', 'pk'
+        )
+    }
+    plantings = TimeToPlant.objects.exclude(plantable_score=None).values_list(
+        'planter__country', 'planter__zip', 'crop_id', *SCORE_FIELDS
+    )
+    scores = {}
+    for country, zip_code, crop_id, *values in plantings:
+        weather_id = weather.get((country, zip_code))
+        if weather_id is None or (weather_id, crop_id) in scores:
+            continue
+        scores[(weather_id, crop_id)] = CropScore(
+            weather_id=weather_id,
+            crop_id=crop_id,
+            **dict(zip(SCORE_FIELDS, values)),
+        )
+    CropScore.objects.bulk_create(scores.values(), batch_size=500)
+
+
+def copy_scores_to_plantings(apps, schema_editor):
+    TimeToPlant = apps.get_model('at2p_app', 'TimeToPlant')
+    CropScore = apps.get_model('at2p_app', 'CropScore')
+    scores = {
+        (country, zip_code, crop_id): values
+        for country, zip_code, crop_id, *values in (
+            CropScore.objects.values_list(
+                'weather__country', 'weather__zip', 'crop_id', *SCORE_FIELDS
+            )
+        )
+    }
+    plantings = []
+    for planting in TimeToPlant.objects.select_related('planter'):
+        values = scores.get(
+            (
+                planting.planter.country.code,
+                planting.planter.zip,
+                planting.crop_id,
+            )
+        )
+        if values is None:
+            continue
+        for field, value in zip(SCORE_FIELDS, values):
+            setattr(planting, field, value)
+        plantings.append(planting)
+    TimeToPlant.objects.bulk_update(plantings, SCORE_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('at2p_app', '0006_timetoplant_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plantable', models.BooleanField(default=False)),
+                ('chill', models.FloatField(blank=True, null=True)),
+                ('cook', models.FloatField(blank=True, null=True)),
+                ('soil', models.FloatField(blank=True, null=True)),
+                ('plantable_score', models.FloatField(blank=True, null=True)),
+                ('scored_weather', models.CharField(blank=True, max_length=32, null=True)),
+                ('scored_crop', models.CharField(blank=True, max_length=32, null=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='at2p_app.crop')),
+                ('weather', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='at2p_app.weatherinfo')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cropscore',
+            constraint=models.UniqueConstraint(fields=('weather', 'crop'), name='unique_weather_crop'),
+        ),
+        # Keep the scores already stored on plantings; rows without one are
+        # scored on the next profile view or background refresh
+        migrations.RunPython(
+            copy_scores_to_crop_scores, copy_scores_to_plantings
+        ),
+        migrations.AlterModelOptions(
+            name='timetoplant',
+            options={'ordering': ['crop']},
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='chill',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='cook',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='plantable',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='plantable_score',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='scored_crop',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='scored_weather',
+        ),
+        migrations.RemoveField(
+            model_name='timetoplant',
+            name='soil',
+        ),
+    ]
@@ -1,13 +1,20 @@
 from typing import Any
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.text import slugify
 from django_countries.fields import CountryField
 from .static import COUNTRIES_ONLY
 from .scrape import historic_temp, forecast_high_low
-import pgeocode
+from .scrape import ahistoric_temp, aforecast_high_low
+from .data_source.cache import acached_weather, cached_weather
+from .data_source.cache import forecast_cache
+from .geocode import grid_cell, locate
 from django.urls import reverse_lazy
-from math import exp
+from .domain.use_cases.plantability import score_crops
 
 
 COUNTRIES_ONLY = COUNTRIES_ONLY
@@ -50,9 +57,21 @@ class Crop(models.Model):
     max_temp = models.SmallIntegerField("Maximum Temperature")
     slug = models.SlugField(null=True)
 
+    threshold_fields = [
+        "min_temp",
+        "min_opt_temp",
+        "max_opt_temp",
+        "max_temp",
+    ]
+
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        CropScore.rescore_crop(self)
+        return result
+
+    def fingerprint(self) -> str:
+        return ":".join(str(getattr(self, f)) for f in self.threshold_fields)
 
     class Meta:
         ordering = ["name"]
@@ -79,6 +98,46 @@ class Planter(AbstractUser):
         return str(self.username)
 
 
+class Climatology(models.Model):
+    lat = models.DecimalField(max_digits=7, decimal_places=4)
+    long = models.DecimalField(max_digits=7, decimal_places=4)
+    month = models.PositiveSmallIntegerField()
+    avg_temp = models.SmallIntegerField()
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["lat", "long", "month"], name="unique_cell_month"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.lat}, {self.long} ({self.month}): {self.avg_temp}"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    @classmethod
+    def lookup(cls, cell: tuple, month: int = None):
+        month = month or timezone.localdate().month
+        return (
+            cls.objects.filter(lat=cell[0], long=cell[1], month=month)
+            .values_list("avg_temp", flat=True)
+            .first()
+        )
+
+    @classmethod
+    def record(cls, cell: tuple, avg_temp: int, month: int = None):
+        month = month or timezone.localdate().month
+        return cls.objects.update_or_create(
+            lat=cell[0],
+            long=cell[1],
+            month=month,
+            defaults={"avg_temp": avg_temp},
+        )[0]
+
+
 class WeatherInfo(models.Model):
     country = CountryField(default="US")
     zip = models.CharField(max_length=10)
@@ -88,9 +147,18 @@ class WeatherInfo(models.Model):
     long = models.DecimalField(
         max_digits=7, decimal_places=4, blank=True, null=True
     )
+    geocoded_for = models.CharField(max_length=16, blank=True, null=True)
     historic_avg_temp = models.SmallIntegerField(blank=True, null=True)
     forecast_high_temp = models.SmallIntegerField(blank=True, null=True)
     forecast_low_temp = models.SmallIntegerField(blank=True, null=True)
+    weather_updated_on = models.DateTimeField(blank=True, null=True)
+    weather_checked_on = models.DateTimeField(blank=True, null=True)
+
+    weather_fields = [
+        "historic_avg_temp",
+        "forecast_high_temp",
+        "forecast_low_temp",
+    ]
 
     def __str__(self) -> str:
         return self.zip + ", " + self.country.code
@@ -106,68 +174,276 @@ class WeatherInfo(models.Model):
         self.long = 0
         super().__init__(*args, **kwargs)
 
+    def geocode_key(self) -> str:
+        return f"{self.country.code}:{self.zip}"
+
+    def needs_geocode(self) -> bool:
+        if self.lat is None or self.long is None:
+            return True
+        return self.geocoded_for != self.geocode_key()
+
     def set_lat_and_long(self):
-        n = pgeocode.Nominatim(self.country.code)
-        place = n.query_postal_code(self.zip)
+        place = locate(self.country.code, self.zip)
         self.lat = float(place.latitude)
         self.long = float(place.longitude)
-        self.save()
+        self.geocoded_for = self.geocode_key()
+        if self.pk is None:
+            self.save()
+        else:
+            self.save(update_fields=["lat", "long", "geocoded_for"])
         return
 
-    def clean(self) -> None:
+    def ensure_lat_and_long(self) -> bool:
+        if not self.needs_geocode():
+            return False
         self.set_lat_and_long()
+        return True
+
+    def clean(self) -> None:
+        self.ensure_lat_and_long()
         return super().clean()
 
+    def weather_cell(self) -> tuple:
+        return grid_cell(self.lat, self.long)
+
     def update_weather(self):
-        self.clean()
-        self.historic_avg_temp = historic_temp(self.lat, self.long)
-        forecast = forecast_high_low(self.lat, self.long)
-        self.forecast_high_temp = forecast[0]
-        self.forecast_low_temp = forecast[1]
-        self.save()
+        self.ensure_lat_and_long()
+        if not getattr(settings, "WEATHER_DB_SINGLE_FLIGHT", False):
+            self._fetch_weather()
+            return
+        with transaction.atomic():
+            locked = WeatherInfo.objects.select_for_update().get(pk=self.pk)
+            if locked.is_fresh():
+                self.historic_avg_temp = locked.historic_avg_temp
+                self.forecast_high_temp = locked.forecast_high_temp
+                self.forecast_low_temp = locked.forecast_low_temp
+                self.weather_updated_on = locked.weather_updated_on
+                self.weather_checked_on = locked.weather_checked_on
+                return
+            self._fetch_weather()
+
+    async def aupdate_weather(self):
+        await sync_to_async(self.ensure_lat_and_long)()
+        cell = self.weather_cell()
+        month = timezone.localdate().month
+        stored = await sync_to_async(Climatology.lookup)(cell, month)
+        scraped = False
+
+        async def historic():
+            nonlocal scraped
+            if stored is not None:
+                return stored
+            scraped = True
+            return await ahistoric_temp(*cell)
+
+        key = (cell, month)
+        avg, forecast = await acached_weather(
+            key, historic, lambda: aforecast_high_low(*cell)
+        )
+        if scraped:
+            await sync_to_async(Climatology.record)(cell, avg, month)
+        await sync_to_async(self._save_weather)(
+            avg, forecast, forecast_cache.stored_at(key)
+        )
+
+    def last_checked(self):
+        return self.weather_checked_on or self.weather_updated_on
+
+    def is_fresh(self, max_age: int = None) -> bool:
+        checked = self.last_checked()
+        if checked is None:
+            return False
+        if max_age is None:
+            max_age = getattr(settings, "WEATHER_FORECAST_TTL", 30 * 60)
+        age = timezone.now() - checked
+        return age < timedelta(seconds=max_age)
+
+    def _fetch_weather(self):
+        cell = self.weather_cell()
+        month = timezone.localdate().month
+        stored = Climatology.lookup(cell, month)
+        scraped = False
+
+        def historic():
+            nonlocal scraped
+            if stored is not None:
+                return stored
+            scraped = True
+            return historic_temp(*cell)
+
+        # The average is per month, so cached values must not cross months;
+        # only a scraped average is recorded, never one served from cache
+        key = (cell, month)
+        avg, forecast = cached_weather(
+            key, historic, lambda: forecast_high_low(*cell)
+        )
+        if scraped:
+            Climatology.record(cell, avg, month)
+        self._save_weather(avg, forecast, forecast_cache.stored_at(key))
+
+    def _save_weather(self, avg, forecast, checked=None):
+        changed = self._set_weather(avg, forecast, checked)
+        if self.pk is None:
+            self.save()
+        elif changed:
+            self.save(update_fields=changed)
+        if set(changed) & set(self.weather_fields):
+            CropScore.update_scores(self)
+
+    def fingerprint(self) -> str:
+        return ":".join(str(getattr(self, f)) for f in self.weather_fields)
+
+    def has_weather(self) -> bool:
+        return all(getattr(self, f) is not None for f in self.weather_fields)
+
+    def planted_crops(self):
+        return Crop.objects.filter(
+            planter__country=self.country, planter__zip=self.zip
+        ).distinct()
+
+    def _set_weather(self, avg, forecast, checked=None) -> list:
+        # checked is when upstream was asked: for a cached forecast that
+        # is when it was fetched, which stays put across cache hits
+        checked = checked or timezone.now()
+        values = dict(zip(self.weather_fields, (avg, *forecast)))
+        changed = [f for f, v in values.items() if getattr(self, f) != v]
+        for field in changed:
+            setattr(self, field, values[field])
+        if changed or self.weather_updated_on is None:
+            self.weather_updated_on = checked
+            changed.append("weather_updated_on")
+        last_checked = self.weather_checked_on
+        if last_checked is None or checked > last_checked:
+            self.weather_checked_on = checked
+            changed.append("weather_checked_on")
+        return changed
 
 
 class TimeToPlant(models.Model):
     planter = models.ForeignKey(Planter, on_delete=models.CASCADE)
     crop = models.ForeignKey(Crop, on_delete=models.CASCADE)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["crop"]
+
+    def __str__(self) -> str:
+        return f"{self.planter}'s {self.crop}"
+
+    def __repr__(self) -> str:
+        return f"{self.planter}'s {self.crop}"
+
+    @classmethod
+    def with_scores(cls, plantings, w):
+        # Joins each planting to its crop's shared score at w's location
+        score = models.FilteredRelation(
+            "crop__cropscore",
+            condition=models.Q(crop__cropscore__weather=w),
+        )
+        return plantings.annotate(score=score).annotate(
+            **{f: models.F(f"score__{f}") for f in CropScore.result_fields}
+        )
+
+
+class CropScore(models.Model):
+    weather = models.ForeignKey(WeatherInfo, on_delete=models.CASCADE)
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE)
     plantable = models.BooleanField(default=False)
     chill = models.FloatField(blank=True, null=True)
     cook = models.FloatField(blank=True, null=True)
     soil = models.FloatField(blank=True, null=True)
     plantable_score = models.FloatField(blank=True, null=True)
+    scored_weather = models.CharField(max_length=32, blank=True, null=True)
+    scored_crop = models.CharField(max_length=32, blank=True, null=True)
     updated_on = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["-plantable_score", "crop"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["weather", "crop"], name="unique_weather_crop"
+            )
+        ]
+
+    result_fields = ["plantable", "chill", "cook", "soil", "plantable_score"]
+    score_fields = result_fields + [
+        "scored_weather",
+        "scored_crop",
+        "updated_on",
+    ]
 
     def __str__(self) -> str:
-        return f"{self.planter}'s {self.crop}"
+        return f"{self.crop} at {self.weather}"
 
     def __repr__(self) -> str:
-        return f"{self.planter}'s {self.crop}"
-
-    def update_plantable(self, w):
-        mn = self.crop.min_temp
-        mx = self.crop.max_temp
-        ol = self.crop.min_opt_temp
-        oh = self.crop.max_opt_temp
-        low = w.forecast_low_temp
-        high = w.forecast_high_temp
-        soil = w.historic_avg_temp
-
-        chill = max((mn - low), 0) / max((ol - mn), 1)
-        cook = max((high - mx), 0) / max((mx - oh), 1)
-        sl = max(max(soil - oh, 0), max(ol - soil, 0)) / (oh - ol)
-        score = round(exp(-max(chill, cook, sl)), 2)
-
-        too_cold = low < mn
-        too_hot = high > mx
-        hit_opt = (high > ol) and (low < oh)
-        extreme_ok = (not too_cold) and (not too_hot)
-
-        self.chill = chill
-        self.cook = cook
-        self.soil = sl
-        self.plantable_score = score
-        self.plantable = hit_opt and extreme_ok
-        self.save()
+        return f"{self.crop} at {self.weather}"
+
+    @classmethod
+    def update_scores(cls, w, crops=None):
+        if not w.has_weather():
+            return
+        if crops is None:
+            crops = w.planted_crops()
+        crops = list(crops)
+        existing = {
+            s.crop_id: s
+            for s in cls.objects.filter(weather=w, crop__in=crops)
+        }
+        stale = []
+        for crop in crops:
+            s = existing.get(crop.pk) or cls(weather=w)
+            s.crop = crop
+            if not s.is_scored_for(w):
+                stale.append(s)
+        if not stale:
+            return
+        cls._score(stale, w)
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [s for s in stale if s.pk is None], ignore_conflicts=True
+            )
+            cls.objects.bulk_update(
+                [s for s in stale if s.pk is not None], cls.score_fields
+            )
+
+    @classmethod
+    def rescore_crop(cls, crop):
+        stale = list(
+            cls.objects.filter(crop=crop)
+            .exclude(scored_crop=crop.fingerprint())
+            .select_related("weather")
+        )
+        for s in stale:
+            s.crop = crop
+            cls._score([s], s.weather)
+        if stale:
+            cls.objects.bulk_update(stale, cls.score_fields)
+
+    def is_scored_for(self, w) -> bool:
+        return (
+            self.scored_weather == w.fingerprint()
+            and self.scored_crop == self.crop.fingerprint()
+        )
+
+    @classmethod
+    def _score(cls, crop_scores, w):
+        now = timezone.now()
+        crops = [s.crop for s in crop_scores]
+        scores = score_crops(
+            w.forecast_low_temp,
+            w.forecast_high_temp,
+            w.historic_avg_temp,
+            [c.min_temp for c in crops],
+            [c.min_opt_temp for c in crops],
+            [c.max_opt_temp for c in crops],
+            [c.max_temp for c in crops],
+        )
+        for i, s in enumerate(crop_scores):
+            s.chill = float(scores.chill[i])
+            s.cook = float(scores.cook[i])
+            s.soil = float(scores.soil[i])
+            s.plantable_score = float(scores.score[i])
+            s.plantable = bool(scores.plantable[i])
+            s.scored_weather = w.fingerprint()
+            s.scored_crop = s.crop.fingerprint()
+            # bulk_update skips auto_now
+            s.updated_on = now
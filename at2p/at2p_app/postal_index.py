@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+import os
+import threading
+import zipfile
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+
+SPLIT_COUNTRIES = ["GB", "IE", "CA"]
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+_indexes = {}
+_bundle_dirs = {}
+_indexes_lock = threading.Lock()
+
+
+class PostalPlace(NamedTuple):
+    country_code: str
+    postal_code: str
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True)
+class PostalIndex:
+    country: str
+    keys: np.ndarray
+    coords: np.ndarray
+
+    @classmethod
+    def load(cls, country: str, directory: str):
+        country = country.upper()
+        keys_path, coords_path = index_paths(country, directory)
+        keys = np.load(keys_path, mmap_mode="r")
+        coords = np.load(coords_path, mmap_mode="r")
+        return cls(country, keys, coords)
+
+    @classmethod
+    def build(cls, country, postal_codes, latitudes, longitudes, directory):
+        country = country.upper()
+        codes = np.array(
+            [normalize_postal_code(country, c) for c in postal_codes]
+        )
+        lat = np.asarray(latitudes, dtype=np.float64)
+        long = np.asarray(longitudes, dtype=np.float64)
+        keys, inverse, counts = np.unique(
+            codes, return_inverse=True, return_counts=True
+        )
+        coords = np.empty((len(keys), 2), dtype=np.float32)
+        coords[:, 0] = np.bincount(inverse, weights=lat) / counts
+        coords[:, 1] = np.bincount(inverse, weights=long) / counts
+
+        os.makedirs(directory, exist_ok=True)
+        keys_path, coords_path = index_paths(country, directory)
+        np.save(keys_path, keys)
+        np.save(coords_path, coords)
+        return cls.load(country, directory)
+
+    def lookup(self, postal_code: str) -> PostalPlace:
+        key = normalize_postal_code(self.country, postal_code)
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            lat, long = self.coords[i]
+            return PostalPlace(self.country, key, float(lat), float(long))
+        return PostalPlace(None, key, float("nan"), float("nan"))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def normalize_postal_code(country: str, postal_code) -> str:
+    code = str(postal_code).strip().upper()
+    if country in SPLIT_COUNTRIES and code:
+        code = code.split()[0]
+    return code
+
+
+def index_paths(country: str, directory: str):
+    prefix = os.path.join(str(directory), country.upper())
+    return f"{prefix}.keys.npy", f"{prefix}.coords.npy"
+
+
+def index_dir() -> str:
+    root = str(getattr(settings, "POSTAL_INDEX_DIR", ""))
+    directory = _bundle_dirs.get(root)
+    if directory is None:
+        directory = bundle_dir(root)
+        _bundle_dirs[root] = directory
+    return directory
+
+
+def bundle_dir(root: str) -> str:
+    current = os.path.join(root, CURRENT_FILE)
+    if not os.path.exists(current):
+        return root
+    with open(current, encoding="UTF-8") as f:
+        return os.path.join(root, f.read().strip())
+
+
+def activate_bundle(root: str, version: str, counts: dict) -> str:
+    directory = os.path.join(root, version)
+    manifest = {"version": version, "countries": counts}
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="UTF-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+    _bundle_dirs.pop(str(root), None)
+    return directory
+
+
+def bundle_manifest(root: str = None) -> dict:
+    directory = index_dir() if root is None else bundle_dir(root)
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def read_postal_file(source: str, country: str):
+    country = country.upper()
+    txt_path = os.path.join(source, f"{country}.txt")
+    zip_path = os.path.join(source, f"{country}.zip")
+    if os.path.exists(txt_path):
+        with open(txt_path, encoding="UTF-8", newline="") as f:
+            return _read_postal_rows(f)
+    if os.path.exists(zip_path):
+        with zipfile.ZipFile(zip_path) as z:
+            with z.open(f"{country}.txt") as raw:
+                f = io.TextIOWrapper(raw, encoding="UTF-8", newline="")
+                return _read_postal_rows(f)
+    raise FileNotFoundError(f"No postal data for {country} in {source}")
+
+
+def _read_postal_rows(f):
+    # GeoNames dumps are headerless TSV; pgeocode's cache is CSV with a header
+    first = f.readline()
+    if first.startswith("country_code,"):
+        header = first.strip().split(",")
+        rows = csv.reader(f)
+    else:
+        header = None
+        rows = csv.reader(f, delimiter="\t")
+        rows = _chain_first(first, rows)
+    code_i = header.index("postal_code") if header else 1
+    lat_i = header.index("latitude") if header else 9
+    long_i = header.index("longitude") if header else 10
+
+    codes, lats, longs = [], [], []
+    for row in rows:
+        if len(row) <= long_i or not row[code_i]:
+            continue
+        try:
+            lat, long = float(row[lat_i]), float(row[long_i])
+        except ValueError:
+            continue
+        codes.append(row[code_i])
+        lats.append(lat)
+        longs.append(long)
+    return codes, lats, longs
+
+
+def _chain_first(first: str, rows):
+    if first:
+        yield next(csv.reader([first], delimiter="\t"))
+    yield from rows
+
+
+def get_index(country: str, directory: str = None) -> PostalIndex:
+    country = str(country).upper()
+    directory = index_dir() if directory is None else str(directory)
+    key = (directory, country)
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+    if not os.path.exists(index_paths(country, directory)[0]):
+        return None
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = PostalIndex.load(country, directory)
+            _indexes[key] = index
+    return index
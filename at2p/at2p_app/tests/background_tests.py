@@ -0,0 +1,35 @@
+from threading import Event
+from unittest import TestCase
+from unittest.mock import patch
+
+from at2p_app import background
+from at2p_app.tests.helpers import wait_until
+
+
+class EnqueueRefreshTests(TestCase):
+    def test_duplicate_refreshes_are_dropped(self):
+        started = Event()
+        release = Event()
+
+        def slow_refresh(pk):
+            started.set()
+            release.wait(5)
+
+        with patch.object(background, 'refresh_weather', slow_refresh):
+            self.assertTrue(background.enqueue_refresh(-1))
+            started.wait(5)
+            self.assertFalse(background.enqueue_refresh(-1))
+            self.assertEqual(background.pending(), 1)
+            release.set()
+            if not wait_until(lambda: not background.pending()):
+                self.fail('Background refresh did not finish')
+        self.assertEqual(background.pending(), 0)
+
+    def test_failed_refresh_is_cleared(self):
+        with patch.object(
+            background, 'refresh_weather', side_effect=ValueError
+        ), self.assertLogs('at2p_app.background', level='ERROR'):
+            background.enqueue_refresh(-2)
+            if not wait_until(lambda: not background.pending()):
+                self.fail('Failed refresh was not cleared')
+        self.assertEqual(background.pending(), 0)
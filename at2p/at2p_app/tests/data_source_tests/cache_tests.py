@@ -0,0 +1,128 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from at2p_app.data_source.cache import (
+    TTLCache,
+    acached_weather,
+    cached_weather,
+)
+
+
+class TTLCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache = TTLCache(ttl=60, max_entries=2)
+        return super().setUp()
+
+    def test_validation(self):
+        self.assertRaises(ValueError, TTLCache, -1)
+        self.assertRaises(ValueError, TTLCache, 60, 0)
+
+    def test_hits_and_misses(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_expiry(self):
+        with patch("at2p_app.data_source.cache.time.monotonic") as now:
+            now.return_value = 1000
+            self.cache.set("a", 1)
+            self.cache.set("b", 2, ttl=600)
+            now.return_value = 1061
+            self.assertIsNone(self.cache.get("a"))
+            self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_stored_at(self):
+        self.assertIsNone(self.cache.stored_at("a"))
+        with patch("at2p_app.data_source.cache.time") as clock:
+            clock.monotonic.return_value = 1000
+            clock.time.return_value = 1_700_000_000
+            self.cache.set("a", 1)
+            stored = self.cache.stored_at("a")
+            clock.monotonic.return_value = 1061
+            self.assertIsNone(self.cache.stored_at("a"))
+        self.assertEqual(stored.timestamp(), 1_700_000_000)
+        self.assertIsNotNone(stored.tzinfo)
+        self.assertEqual(self.cache.stats()["hits"], 0)
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+
+    def test_get_or_set(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return 42
+
+        self.assertEqual(self.cache.get_or_set("a", fetch), 42)
+        self.assertEqual(self.cache.get_or_set("a", fetch), 42)
+        self.assertEqual(len(calls), 1)
+
+
+class CachedWeatherTests(TestCase):
+    def test_fetches_only_missing_values(self):
+        historic = TTLCache(ttl=60)
+        forecast = TTLCache(ttl=60)
+        calls = []
+
+        def avg():
+            calls.append("avg")
+            return 60
+
+        def high_low():
+            calls.append("forecast")
+            return [80, 40]
+
+        key = ("US", "22407")
+        result = cached_weather(key, avg, high_low, historic, forecast)
+        self.assertEqual(result, (60, [80, 40]))
+        forecast.delete(key)
+        cached_weather(key, avg, high_low, historic, forecast)
+        self.assertEqual(sorted(calls), ["avg", "forecast", "forecast"])
+
+
+class AsyncCachedWeatherTests(TestCase):
+    def test_concurrent_misses_fetch_once(self):
+        historic_store, forecast_store = TTLCache(60), TTLCache(60)
+        calls = []
+
+        async def avg():
+            calls.append("avg")
+            await asyncio.sleep(0.01)
+            return 57
+
+        async def high_low():
+            calls.append("high_low")
+            await asyncio.sleep(0.01)
+            return (84, 49)
+
+        async def main():
+            return await asyncio.gather(
+                *[
+                    acached_weather(
+                        ("US", "22405"),
+                        avg,
+                        high_low,
+                        historic_store,
+                        forecast_store,
+                    )
+                    for _ in range(10)
+                ]
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual(results, [(57, (84, 49))] * 10)
+        self.assertEqual(sorted(calls), ["avg", "high_low"])
+        self.assertEqual(historic_store.get(("US", "22405")), 57)
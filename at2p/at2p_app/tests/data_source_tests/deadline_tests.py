@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import requests
+from at2p_app.data_source.cache import (
+    TTLCache,
+    acached_weather,
+    cached_weather,
+)
+from at2p_app.data_source.deadline import (
+    bounded,
+    check,
+    deadline,
+    enforced,
+    remaining,
+)
+from at2p_app.data_source.extract import extract_historic, fetch_and_extract
+from at2p_app.data_source.parallel import run_parallel
+from at2p_app.data_source.singleflight import AsyncSingleFlight, SingleFlight
+from at2p_app.domain.common.error import DeadlineError, WeatherError
+from at2p_app.tests.data_source_tests.extract_tests import HISTORIC
+
+
+class DeadlineTests(TestCase):
+    def test_no_deadline(self):
+        self.assertIsNone(remaining())
+        self.assertEqual(bounded((3, 10)), (3, 10))
+        check()
+
+    def test_zero_disables(self):
+        with deadline(0):
+            self.assertIsNone(remaining())
+
+    def test_remaining_and_reset(self):
+        with deadline(5):
+            self.assertLessEqual(remaining(), 5)
+            self.assertGreater(remaining(), 4)
+        self.assertIsNone(remaining())
+
+    def test_inner_deadline_cannot_extend(self):
+        with deadline(1):
+            with deadline(60):
+                self.assertLessEqual(remaining(), 1)
+
+    def test_bounded_timeouts(self):
+        with deadline(1):
+            connect, read = bounded((3.05, 10))
+            self.assertLessEqual(connect, 1)
+            self.assertLessEqual(read, 1)
+            self.assertEqual(bounded(0.5), 0.5)
+
+    def test_expired_deadline_raises(self):
+        with deadline(0.001):
+            time.sleep(0.01)
+            self.assertRaises(DeadlineError, check, "url")
+            self.assertRaises(DeadlineError, bounded, (3, 10), "url")
+
+    def test_deadline_error_is_weather_error(self):
+        self.assertTrue(issubclass(DeadlineError, WeatherError))
+
+    def test_enforced_converts_timeouts_under_deadline(self):
+        with self.assertRaises(requests.Timeout):
+            with enforced("url"):
+                raise requests.Timeout
+        with deadline(5):
+            with self.assertRaises(DeadlineError):
+                with enforced("url"):
+                    raise requests.Timeout
+
+    def test_parallel_calls_share_deadline(self):
+        with deadline(5):
+            results = run_parallel(remaining, remaining)
+        self.assertTrue(all(r is not None for r in results))
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_extraction_stops_at_deadline(self, fetch):
+        def slow_chunks():
+            yield b"<html><head><title>Weather</title></head>"
+            time.sleep(0.02)
+            yield b"<body></body></html>"
+
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = slow_chunks()
+        fetch.return_value.__enter__.return_value = response
+        with deadline(0.01):
+            self.assertRaises(
+                DeadlineError, fetch_and_extract, "url", extract_historic
+            )
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_parsed_value_survives_deadline(self, fetch):
+        def chunks():
+            yield HISTORIC
+            time.sleep(0.02)
+            yield b"</body></html>"
+
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = chunks()
+        fetch.return_value.__enter__.return_value = response
+        with deadline(0.01):
+            self.assertEqual(fetch_and_extract("url", extract_historic), 57)
+
+    def test_waiting_single_flight_caller_hits_deadline(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 57
+
+        def call():
+            stores = TTLCache(60), TTLCache(60)
+            return cached_weather("key", slow, lambda: 49, *stores, flight)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        try:
+            with deadline(0.01):
+                self.assertRaises(DeadlineError, call)
+        finally:
+            release.set()
+            leader.join()
+
+    def test_waiting_async_single_flight_caller_hits_deadline(self):
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return 57
+
+        async def high_low():
+            return (84, 49)
+
+        async def call():
+            return await acached_weather(
+                "key", slow, high_low, TTLCache(60), TTLCache(60), flight
+            )
+
+        async def main():
+            leader = asyncio.ensure_future(call())
+            await asyncio.sleep(0)
+            with deadline(0.01):
+                with self.assertRaises(DeadlineError):
+                    await call()
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), (57, (84, 49)))
@@ -0,0 +1,86 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from at2p_app.data_source.cache import negative_cache
+from at2p_app.data_source.extract import (
+    ForecastRange,
+    extract_forecast,
+    extract_historic,
+    fetch_and_extract,
+)
+from at2p_app.domain.common.error import WeatherError
+from django.core.exceptions import ValidationError
+
+HEAD = b"<html><head><title>Weather</title></head><body>"
+HISTORIC = HEAD + (
+    b"<table><tr><td>ignored</td></tr>"
+    b'<tr class="c0 sep-t"><td>57 <span>&deg;F</span></td><td>9</td></tr>'
+    b"</table>"
+)
+FORECAST = HEAD + (
+    b'<table id="wt-ext"><thead><tr><th>Day</th></tr></thead><tbody>'
+    b"<tr><th>Mon</th><td>x</td><td>78 / 51 &deg;F</td></tr>"
+    b"<tr><th>Tue</th><td>x</td><td>84 / 60 &deg;F</td></tr>"
+    b"<tr><th>Wed</th><td>x</td><td>70 / 49 &deg;F</td></tr>"
+    b"</tbody></table>"
+)
+
+
+def chunked(page: bytes, size: int = 7):
+    for i in range(0, len(page), size):
+        yield page[i:i + size]
+
+
+def must_not_read():
+    raise AssertionError("read past the target element")
+    yield b""
+
+
+class ExtractTests(TestCase):
+    def test_historic(self):
+        self.assertEqual(extract_historic(chunked(HISTORIC)), 57)
+
+    def test_forecast(self):
+        forecast = extract_forecast(chunked(FORECAST))
+        self.assertIsInstance(forecast, ForecastRange)
+        self.assertEqual(forecast, ForecastRange(high=84, low=49))
+
+    def test_stops_at_target(self):
+        def page():
+            yield FORECAST
+            yield from must_not_read()
+
+        self.assertEqual(extract_forecast(page()).high, 84)
+
+    def test_unknown_address(self):
+        page = b"<html><head><title>Unknown address</title></head>"
+        self.assertRaises(ValidationError, extract_historic, [page])
+        self.assertRaises(ValidationError, extract_forecast, [page])
+
+    def test_missing_target(self):
+        self.assertRaises(WeatherError, extract_historic, [HEAD])
+        self.assertRaises(WeatherError, extract_forecast, [HISTORIC])
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_fetch_and_extract_skips_rest_of_page(self, fetch):
+        response = MagicMock(status_code=200)
+        chunks = iter([HISTORIC, b"</body>", b"</html>"])
+        response.iter_content.return_value = chunks
+        fetch.return_value.__enter__.return_value = response
+        self.assertEqual(fetch_and_extract("url", extract_historic), 57)
+        self.assertEqual(list(chunks), [b"</body>", b"</html>"])
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_unknown_address_is_remembered(self, fetch):
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = [
+            b"<html><head><title>Unknown address</title></head>"
+        ]
+        fetch.return_value.__enter__.return_value = response
+        base = "https://www.timeanddate.com/weather/@0,0"
+        with patch.dict(negative_cache._entries, clear=True):
+            for url in (base + "/historic", base + "/ext", base + "/ext"):
+                self.assertRaises(
+                    ValidationError, fetch_and_extract, url, extract_historic
+                )
+        fetch.assert_called_once_with(base + "/historic", stream=True)
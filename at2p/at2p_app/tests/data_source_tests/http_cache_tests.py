@@ -0,0 +1,106 @@
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from at2p_app.data_source.extract import extract_historic, fetch_and_extract
+from at2p_app.data_source.http_cache import (
+    ResponseCache,
+    body_digest,
+    parse_memo,
+)
+from at2p_app.tests.data_source_tests.extract_tests import HISTORIC
+
+URL = "https://www.timeanddate.com/weather/@z-us-22405/historic"
+
+
+def response(status_code=200, body=b"", headers=None):
+    return MagicMock(
+        status_code=status_code, content=body, headers=headers or {}
+    )
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        return super().tearDown()
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get(URL))
+
+    def test_round_trip_survives_restart(self):
+        modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+        self.cache.store(URL, HISTORIC, '"abc"', modified)
+        entry = ResponseCache(self.tmp.name).get(URL)
+        self.assertEqual(entry.body, HISTORIC)
+        self.assertEqual(entry.digest, body_digest(HISTORIC))
+        self.assertEqual(
+            entry.conditional_headers(),
+            {
+                "If-None-Match": '"abc"',
+                "If-Modified-Since": modified,
+            },
+        )
+
+    def test_stored_compressed(self):
+        body = HISTORIC * 20
+        self.cache.store(URL, body, '"abc"')
+        self.assertLess(self.cache.path(URL).stat().st_size, len(body) / 4)
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.cache.store(URL, HISTORIC, '"abc"')
+        self.cache.path(URL).write_bytes(b"not gzip")
+        self.assertIsNone(self.cache.get(URL))
+
+    def test_clear(self):
+        self.cache.store(URL, HISTORIC, '"abc"')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(URL))
+
+
+class ConditionalFetchTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp.name)
+        self.parses = 0
+        patches = [
+            patch("at2p_app.data_source.extract.response_cache", self.cache),
+            patch.dict(parse_memo._entries, clear=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        return super().tearDown()
+
+    def counting_extract(self, chunks, url=None):
+        self.parses += 1
+        return extract_historic(chunks, url)
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_not_modified_reuses_body_and_parse(self, fetch):
+        fetch.return_value.__enter__.return_value = response(
+            body=HISTORIC, headers={"ETag": '"v1"'}
+        )
+        self.assertEqual(fetch_and_extract(URL, self.counting_extract), 57)
+        fetch.assert_called_with(URL, headers={})
+
+        fetch.return_value.__enter__.return_value = response(304)
+        self.assertEqual(fetch_and_extract(URL, self.counting_extract), 57)
+        fetch.assert_called_with(URL, headers={"If-None-Match": '"v1"'})
+        self.assertEqual(self.parses, 1)
+
+    @patch("at2p_app.data_source.extract.fetch")
+    def test_unchanged_body_skips_parse(self, fetch):
+        fetch.return_value.__enter__.return_value = response(body=HISTORIC)
+        fetch_and_extract(URL, self.counting_extract)
+        fetch_and_extract(URL, self.counting_extract)
+        self.assertEqual(self.parses, 1)
+        self.assertIsNone(self.cache.get(URL))
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from threading import Thread
+from unittest import TestCase
+
+from at2p_app.data_source.limiter import AdaptiveLimiter
+from at2p_app.data_source.scheduler import BACKGROUND, INTERACTIVE
+from at2p_app.tests.helpers import wait_until
+
+
+class AdaptiveLimiterTests(TestCase):
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(initial=10, minimum=1, maximum=4)
+
+    def test_fast_requests_grow_limit(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=8)
+        for _ in range(10):
+            with limiter.slot():
+                pass
+        self.assertGreater(limiter.limit, 2)
+        self.assertLessEqual(limiter.limit, 8)
+
+    def test_limit_capped_at_maximum(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=3)
+        for _ in range(100):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.limit, 3)
+
+    def test_error_halves_limit_once_per_window(self):
+        limiter = AdaptiveLimiter(initial=8, latency_target=60)
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                with limiter.slot():
+                    raise RuntimeError
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_slow_request_backs_off(self):
+        limiter = AdaptiveLimiter(initial=4, latency_target=0.01)
+        with limiter.slot():
+            time.sleep(0.02)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_limit_not_below_minimum(self):
+        limiter = AdaptiveLimiter(initial=2, minimum=2, latency_target=0)
+        limiter.release(limiter.acquire(), ok=False)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_unsent_request_does_not_adjust_limit(self):
+        limiter = AdaptiveLimiter(initial=4, latency_target=0)
+        limiter.release(limiter.acquire(), ok=None)
+        self.assertEqual(limiter.stats()["limit"], 4)
+        self.assertEqual(limiter.stats()["in_flight"], 0)
+
+    def test_in_flight_bounded_by_limit(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=2)
+        peak = []
+
+        def request():
+            with limiter.slot():
+                peak.append(limiter.stats()["in_flight"])
+                time.sleep(0.01)
+
+        threads = [Thread(target=request) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(max(peak), 2)
+
+    def test_interactive_waiters_go_first(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        held = limiter.acquire()
+        order = []
+
+        def request(level, name):
+            limiter.release(limiter.acquire(level=level), ok=True)
+            order.append(name)
+
+        background = Thread(target=request, args=(BACKGROUND, "background"))
+        background.start()
+        if not wait_until(lambda: limiter.stats()["waiting"]):
+            self.fail("Background waiter never queued")
+        interactive = Thread(
+            target=request, args=(INTERACTIVE, "interactive")
+        )
+        interactive.start()
+        if not wait_until(lambda: limiter.stats()["waiting"] >= 2):
+            self.fail("Interactive waiter never queued")
+        limiter.release(held)
+        background.join()
+        interactive.join()
+        self.assertEqual(order, ["interactive", "background"])
+
+    def test_timed_out_waiter_unblocks_lower_priority(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        limiter.acquire()
+        with self.assertRaises(TimeoutError):
+            limiter.acquire(timeout=0.01, level=INTERACTIVE)
+        self.assertEqual(limiter.stats()["waiting"], 0)
+
+
+class AsyncAdaptiveLimiterTests(TestCase):
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+
+        async def main():
+            held = await limiter.aacquire()
+            task = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            limiter.release(held)
+            limiter.release(await limiter.aacquire(timeout=1))
+
+        asyncio.run(main())
+        self.assertEqual(
+            limiter.stats(), {"limit": 1, "in_flight": 0, "waiting": 0}
+        )
+
+    def test_waiter_wakes_when_a_thread_releases(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        held = limiter.acquire()
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            release = Thread(target=limiter.release, args=(held,))
+            loop.call_later(0.01, release.start)
+            started = time.monotonic()
+            limiter.release(await limiter.aacquire(timeout=1))
+            return time.monotonic() - started
+
+        self.assertLess(asyncio.run(main()), 0.5)
+
+    def test_timeout_and_priority(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+        order = []
+
+        async def request(level, name):
+            limiter.release(await limiter.aacquire(level=level))
+            order.append(name)
+
+        async def main():
+            held = await limiter.aacquire()
+            with self.assertRaises(TimeoutError):
+                await limiter.aacquire(timeout=0.01)
+            background = asyncio.ensure_future(
+                request(BACKGROUND, "background")
+            )
+            await asyncio.sleep(0)
+            interactive = asyncio.ensure_future(
+                request(INTERACTIVE, "interactive")
+            )
+            await asyncio.sleep(0)
+            limiter.release(held)
+            await asyncio.gather(background, interactive)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["interactive", "background"])
@@ -0,0 +1,45 @@
+import time
+from threading import Barrier, Event
+from unittest import TestCase
+
+from at2p_app.data_source.parallel import run_parallel
+from django.core.exceptions import ValidationError
+
+
+class RunParallelTests(TestCase):
+    def test_results_keep_call_order(self):
+        barrier = Barrier(2, timeout=5)
+
+        def first():
+            barrier.wait()
+            return 1
+
+        def second():
+            barrier.wait()
+            return 2
+
+        self.assertEqual(run_parallel(first, second), [1, 2])
+
+    def test_errors_propagate(self):
+        def bad():
+            raise ValidationError("Scraping error: address not found.")
+
+        self.assertRaises(ValidationError, run_parallel, bad, lambda: 1)
+
+    def test_errors_do_not_wait_for_siblings(self):
+        running, release = Event(), Event()
+
+        def bad():
+            running.wait(5)
+            raise ValidationError("Scraping error: address not found.")
+
+        def slow():
+            running.set()
+            release.wait(5)
+
+        started = time.monotonic()
+        try:
+            self.assertRaises(ValidationError, run_parallel, bad, slow)
+            self.assertLess(time.monotonic() - started, 1)
+        finally:
+            release.set()
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from unittest import TestCase
+
+from at2p_app.data_source.parallel import run_parallel
+from at2p_app.data_source.scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    OutboundScheduler,
+    TokenBucket,
+    current_priority,
+    priority,
+)
+from at2p_app.tests.helpers import wait_until
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertGreater(bucket.take(), 0)
+
+
+class PriorityTests(TestCase):
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with priority(BACKGROUND):
+            self.assertEqual(current_priority(), BACKGROUND)
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+    def test_priority_reaches_parallel_calls(self):
+        with priority(BACKGROUND):
+            levels = run_parallel(current_priority, current_priority)
+        self.assertEqual(levels, [BACKGROUND, BACKGROUND])
+
+
+class OutboundSchedulerTests(TestCase):
+    def test_disabled_does_not_wait(self):
+        scheduler = OutboundScheduler(rate=0, burst=0)
+        self.assertEqual(scheduler.acquire("example.com"), 0)
+        self.assertEqual(scheduler.stats()["granted"], 0)
+
+    def test_burst_is_granted_immediately(self):
+        scheduler = OutboundScheduler(rate=1, burst=3)
+        for _ in range(3):
+            scheduler.acquire("example.com")
+        stats = scheduler.stats()
+        self.assertEqual(stats["granted"], 3)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertLess(stats["max_wait"], 0.5)
+
+    def test_hosts_have_separate_buckets(self):
+        scheduler = OutboundScheduler(rate=0.1, burst=1)
+        scheduler.acquire("a.example.com")
+        self.assertLess(scheduler.acquire("b.example.com"), 0.5)
+
+    def test_timeout(self):
+        scheduler = OutboundScheduler(rate=0.1, burst=1)
+        scheduler.acquire("example.com")
+        with self.assertRaises(TimeoutError):
+            scheduler.acquire("example.com", timeout=0.05)
+        self.assertEqual(scheduler.queue_depth("example.com"), 0)
+
+    def test_interactive_before_background(self):
+        scheduler = OutboundScheduler(rate=20, burst=1)
+        scheduler.acquire("example.com")
+        order = []
+
+        def request(level):
+            scheduler.acquire("example.com", level)
+            order.append(level)
+
+        threads = [
+            Thread(target=request, args=(BACKGROUND,)) for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+        if not wait_until(lambda: scheduler.queue_depth() >= 3):
+            self.fail("Background requests never queued")
+        interactive = Thread(target=request, args=(INTERACTIVE,))
+        interactive.start()
+        threads.append(interactive)
+        for t in threads:
+            t.join()
+        self.assertIn(order.index(INTERACTIVE), (0, 1))
+        self.assertEqual(scheduler.stats()["granted"], 5)
+
+
+class AsyncOutboundSchedulerTests(TestCase):
+    def test_waits_do_not_hold_executor_threads(self):
+        scheduler = OutboundScheduler(rate=10, burst=1)
+
+        async def main():
+            executor = ThreadPoolExecutor(max_workers=1)
+            asyncio.get_running_loop().set_default_executor(executor)
+            waits = [
+                asyncio.ensure_future(scheduler.aacquire("example.com"))
+                for _ in range(4)
+            ]
+            await asyncio.sleep(0)
+            started = time.monotonic()
+            await asyncio.to_thread(lambda: None)
+            offloaded = time.monotonic() - started
+            await asyncio.gather(*waits)
+            return offloaded
+
+        self.assertLess(asyncio.run(main()), 0.1)
+        stats = scheduler.stats()
+        self.assertEqual(stats["granted"], 4)
+        self.assertGreater(stats["max_wait"], 0.2)
+
+    def test_shares_queue_with_threads(self):
+        scheduler = OutboundScheduler(rate=20, burst=1)
+        scheduler.acquire("example.com")
+        order = []
+
+        def request():
+            scheduler.acquire("example.com", BACKGROUND)
+            order.append(BACKGROUND)
+
+        async def main():
+            threads = [Thread(target=request) for _ in range(3)]
+            for t in threads:
+                t.start()
+            queued = await asyncio.to_thread(
+                wait_until, lambda: scheduler.queue_depth() >= 3
+            )
+            await scheduler.aacquire("example.com", INTERACTIVE)
+            order.append(INTERACTIVE)
+            for t in threads:
+                await asyncio.to_thread(t.join)
+            return queued
+
+        self.assertTrue(asyncio.run(main()))
+        self.assertIn(order.index(INTERACTIVE), (0, 1))
+        self.assertEqual(scheduler.stats()["granted"], 5)
+
+    def test_timeout_and_cancel_leave_queue(self):
+        scheduler = OutboundScheduler(rate=0.1, burst=1)
+        scheduler.acquire("example.com")
+
+        async def main():
+            with self.assertRaises(TimeoutError):
+                await scheduler.aacquire("example.com", timeout=0.05)
+            task = asyncio.ensure_future(scheduler.aacquire("example.com"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        self.assertEqual(scheduler.queue_depth("example.com"), 0)
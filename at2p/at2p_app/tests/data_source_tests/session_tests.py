@@ -0,0 +1,105 @@
+import asyncio
+import time
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from at2p_app.data_source import session
+from at2p_app.data_source.deadline import deadline
+from at2p_app.data_source.limiter import AdaptiveLimiter
+from at2p_app.domain.common.error import DeadlineError
+from django.conf import settings
+
+
+class SessionTests(TestCase):
+    def tearDown(self) -> None:
+        session.close_session()
+        return super().tearDown()
+
+    def test_session_is_shared(self):
+        sessions = []
+        threads = [
+            Thread(target=lambda: sessions.append(session.get_session()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(map(id, sessions))), 1)
+        self.assertIs(sessions[0], session.get_session())
+
+    def test_session_is_pooled(self):
+        s = session.get_session()
+        adapter = s.get_adapter("https://www.timeanddate.com")
+        self.assertEqual(adapter._pool_maxsize, settings.SCRAPE_POOL_SIZE)
+        self.assertIn("gzip", s.headers["Accept-Encoding"])
+
+    def test_fetch_sets_timeout(self):
+        with patch.object(session.get_session(), "get") as get:
+            get.return_value = MagicMock(status_code=200)
+            session.fetch("https://example.com")
+        get.assert_called_once_with(
+            "https://example.com", timeout=session.timeout()
+        )
+
+    @patch("at2p_app.data_source.session.scrape_limiter")
+    def test_overload_reported_to_limiter(self, limiter):
+        limiter.acquire.return_value = 0
+        with patch.object(session.get_session(), "get") as get:
+            get.return_value = MagicMock(status_code=503)
+            session.fetch("https://example.com")
+        limiter.release.assert_called_once_with(0, False)
+
+    @patch("at2p_app.data_source.session.scrape_limiter")
+    @patch("at2p_app.data_source.session.scheduler")
+    def test_limiter_slot_taken_after_admission(self, scheduler, limiter):
+        order = MagicMock()
+        order.attach_mock(scheduler.acquire, "admit")
+        order.attach_mock(limiter.acquire, "slot")
+        limiter.acquire.return_value = 0
+        with patch.object(session.get_session(), "get") as get:
+            get.return_value = MagicMock(status_code=200)
+            session.fetch("https://example.com")
+        self.assertEqual(
+            [c[0] for c in order.mock_calls], ["admit", "slot"]
+        )
+        limiter.release.assert_called_once_with(0, True)
+
+    def test_cancelled_afetch_does_not_leak_a_slot(self):
+        limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+
+        async def main():
+            held = limiter.acquire()
+            task = asyncio.ensure_future(session.afetch("https://a.test"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            limiter.release(held)
+            await asyncio.sleep(0.05)
+
+        with patch.object(session, "scrape_limiter", limiter):
+            asyncio.run(main())
+        self.assertEqual(limiter.stats()["in_flight"], 0)
+
+    @patch("at2p_app.data_source.session.scrape_limiter")
+    def test_slot_wait_is_taken_off_the_timeout(self, limiter):
+        limiter.acquire.side_effect = lambda timeout: time.sleep(0.2)
+        with patch.object(session.get_session(), "get") as get:
+            get.return_value = MagicMock(status_code=200)
+            with deadline(1):
+                session.fetch("https://example.com")
+        connect, read = get.call_args.kwargs["timeout"]
+        self.assertLessEqual(max(connect, read), 0.8)
+
+    @patch("at2p_app.data_source.session.scrape_limiter")
+    def test_deadline_spent_on_slot_wait_is_not_a_sample(self, limiter):
+        limiter.acquire.side_effect = lambda timeout: time.sleep(0.02) or 0
+        with patch.object(session.get_session(), "get") as get:
+            with deadline(0.01):
+                self.assertRaises(
+                    DeadlineError, session.fetch, "https://example.com"
+                )
+        get.assert_not_called()
+        limiter.release.assert_called_once_with(0, None)
@@ -0,0 +1,110 @@
+import asyncio
+from threading import Event, Thread
+from unittest import TestCase
+
+from at2p_app.data_source.singleflight import AsyncSingleFlight, SingleFlight
+from at2p_app.tests.helpers import wait_until
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self) -> None:
+        self.flight = SingleFlight()
+        self.release = Event()
+        self.calls = 0
+        return super().setUp()
+
+    def slow_fetch(self):
+        self.calls += 1
+        self.release.wait(5)
+        return "weather"
+
+    def run_concurrently(self, fetch, n=5):
+        results = []
+
+        def call():
+            try:
+                results.append(self.flight.do(("US", "22407"), fetch))
+            except ValueError as e:
+                results.append(e)
+
+        threads = [Thread(target=call) for _ in range(n)]
+        threads[0].start()
+        if not wait_until(self.flight.in_flight):
+            self.release.set()
+            self.fail("Leader call never started")
+        for t in threads[1:]:
+            t.start()
+        self.release.set()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_calls_share_one_fetch(self):
+        results = self.run_concurrently(self.slow_fetch)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ["weather"] * 5)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_errors_are_shared(self):
+        def failing_fetch():
+            self.slow_fetch()
+            raise ValueError("bad zip")
+
+        results = self.run_concurrently(failing_fetch, n=3)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_sequential_calls_fetch_again(self):
+        self.release.set()
+        self.flight.do("a", self.slow_fetch)
+        self.flight.do("a", self.slow_fetch)
+        self.assertEqual(self.calls, 2)
+
+
+class AsyncSingleFlightTests(TestCase):
+    def setUp(self) -> None:
+        self.flight = AsyncSingleFlight()
+        self.calls = 0
+        return super().setUp()
+
+    async def slow_fetch(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return "weather"
+
+    def test_concurrent_calls_share_one_fetch(self):
+        async def main():
+            return await asyncio.gather(
+                *[self.flight.do("a", self.slow_fetch) for _ in range(5)]
+            )
+
+        self.assertEqual(asyncio.run(main()), ["weather"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_errors_are_shared(self):
+        async def failing_fetch():
+            await self.slow_fetch()
+            raise ValueError("bad zip")
+
+        async def main():
+            return await asyncio.gather(
+                *[self.flight.do("a", failing_fetch) for _ in range(3)],
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_timed_out_waiter_leaves_fetch_running(self):
+        async def main():
+            leader = asyncio.ensure_future(
+                self.flight.do("a", self.slow_fetch)
+            )
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.flight.do("a", self.slow_fetch, timeout=0.001)
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), "weather")
+        self.assertEqual(self.calls, 1)
@@ -1,12 +1,53 @@
+import asyncio
+from threading import Barrier, Lock
+from time import sleep
+from types import SimpleNamespace
 from unittest import TestCase
-from at2p_app.data_source.weather_source import WeatherScraper
+from unittest.mock import patch
+from at2p_app.data_source.cache import TTLCache
+from at2p_app.data_source.deadline import check
+from at2p_app.data_source.latency import LatencyWindow
+from at2p_app.data_source.weather_source import (
+    AsyncWeatherScraper,
+    CachedWeatherSource,
+    HedgedWeatherSource,
+    StoredWeatherSource,
+    WeatherScraper,
+    WeatherSource,
+)
+from at2p_app.domain.common.error import DeadlineError, WeatherError
 from at2p_app.domain.entities.place import Place
+from at2p_app.domain.value_objects.temperature import Temperature
 from at2p_app.domain.value_objects.weather import Weather
+from at2p_app.models import WeatherInfo
+from at2p_app.tests.data_source_tests.extract_tests import FORECAST, HISTORIC
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+from django.test import TestCase as DjangoTestCase
+from django.utils import timezone
+
+
+class FakeScraper(WeatherScraper):
+    barrier = None
+    fail = False
+
+    def historic_temp(self) -> Temperature:
+        if self.barrier:
+            self.barrier.wait()
+        if self.fail:
+            raise ValidationError("Scraping error: address not found.")
+        return Temperature.new(60)
+
+    def forecast_high_low(self) -> Temperature:
+        if self.barrier:
+            self.barrier.wait()
+        return Temperature.new(80), Temperature.new(40)
 
 
 class WeatherScraperTests(TestCase):
     def setUp(self) -> None:
         place = Place.new("22405")
+        self.place = place
         self.scraper = WeatherScraper.new(place)
         return super().setUp()
 
@@ -16,3 +57,270 @@ class WeatherScraperTests(TestCase):
     def test_get_weather(self):
         weather = self.scraper.get()
         self.assertIsInstance(weather, Weather)
+
+    def test_get_fetches_concurrently(self):
+        scraper = FakeScraper.new(self.place)
+        scraper.barrier = Barrier(2, timeout=5)
+        weather = scraper.get()
+        self.assertEqual(weather.avg, Temperature.new(60))
+        self.assertEqual(weather.high, Temperature.new(80))
+        self.assertEqual(weather.low, Temperature.new(40))
+
+    def test_get_sequentially(self):
+        scraper = FakeScraper.new(self.place, concurrent=False)
+        self.assertIsInstance(scraper.get(), Weather)
+
+    def test_get_propagates_errors(self):
+        scraper = FakeScraper.new(self.place)
+        scraper.fail = True
+        self.assertRaises(ValidationError, scraper.get)
+
+
+class CountingScraper(FakeScraper):
+    calls = 0
+
+    def historic_temp(self) -> Temperature:
+        CountingScraper.calls += 1
+        return super().historic_temp()
+
+    def forecast_high_low(self) -> Temperature:
+        CountingScraper.calls += 1
+        return super().forecast_high_low()
+
+
+class CachedWeatherSourceTests(TestCase):
+    def setUp(self) -> None:
+        CountingScraper.calls = 0
+        self.historic = TTLCache(ttl=60)
+        self.forecast = TTLCache(ttl=60)
+        return super().setUp()
+
+    def source(self, zip_code="22405"):
+        place = Place.new(zip_code)
+        return CachedWeatherSource(
+            place,
+            CountingScraper.new(place),
+            self.historic,
+            self.forecast,
+        )
+
+    def test_instantiation(self):
+        source = CachedWeatherSource.new(Place.new("22405"))
+        self.assertIsInstance(source, WeatherSource)
+        self.assertRaises(WeatherError, CachedWeatherSource.new, "22405")
+
+    def test_repeat_gets_hit_cache(self):
+        first = self.source().get()
+        second = self.source().get()
+        self.assertEqual(CountingScraper.calls, 2)
+        self.assertEqual(first.high, second.high)
+        self.assertEqual(self.forecast.stats()["hits"], 1)
+        self.assertEqual(self.historic.stats()["hits"], 1)
+
+    def test_expired_forecast_refetches_only_forecast(self):
+        self.source().get()
+        self.forecast.clear()
+        self.source().get()
+        self.assertEqual(CountingScraper.calls, 3)
+
+    def test_keys_by_zip(self):
+        self.source("22405").get()
+        self.source("22407").get()
+        self.assertEqual(CountingScraper.calls, 4)
+
+
+class TrackingScraper(FakeScraper):
+    lock = Lock()
+    in_flight = 0
+    peak = 0
+    fetched = []
+
+    def get(self):
+        with self.lock:
+            TrackingScraper.in_flight += 1
+            TrackingScraper.peak = max(self.peak, self.in_flight)
+            TrackingScraper.fetched.append(self._place.zip_code.zip)
+        sleep(0.01)
+        with self.lock:
+            TrackingScraper.in_flight -= 1
+        if self._place.zip_code.zip == "00000":
+            raise ValidationError("Scraping error: address not found.")
+        return super().get()
+
+
+class GetManyTests(TestCase):
+    def setUp(self) -> None:
+        TrackingScraper.peak = 0
+        TrackingScraper.fetched = []
+        return super().setUp()
+
+    def test_get_many(self):
+        zips = [str(22400 + i) for i in range(10)]
+        places = [Place.new(z) for z in zips + zips[:3] + ["00000"]]
+        results = list(TrackingScraper.get_many(places, max_workers=3))
+
+        self.assertEqual(len(results), 11)
+        self.assertEqual(
+            sorted(TrackingScraper.fetched), sorted(zips + ["00000"])
+        )
+        self.assertLessEqual(TrackingScraper.peak, 3)
+        failed = [r for r in results if not r.ok]
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0].place.zip_code.zip, "00000")
+        self.assertIsInstance(failed[0].error, ValidationError)
+        for r in results:
+            if r.ok:
+                self.assertIsInstance(r.weather, Weather)
+                self.assertEqual(r.weather.place_id, r.place.id)
+
+    def test_get_many_streams_results(self):
+        places = (Place.new(str(22400 + i)) for i in range(5))
+        results = TrackingScraper.get_many(places, max_workers=2)
+        first = next(results)
+        self.assertTrue(first.ok)
+        self.assertLess(len(TrackingScraper.fetched), 5)
+        results.close()
+
+
+class AsyncWeatherScraperTests(TestCase):
+    @patch("at2p_app.data_source.extract.afetch")
+    def test_aget(self, afetch):
+        pages = {
+            "historic": HISTORIC,
+            "ext": FORECAST,
+        }
+
+        async def fake_afetch(url):
+            return SimpleNamespace(
+                status_code=200, content=pages[url.rsplit("/", 1)[1]]
+            )
+
+        afetch.side_effect = fake_afetch
+        place = Place.new("22405")
+        weather = asyncio.run(AsyncWeatherScraper.new(place).aget())
+        self.assertEqual(weather.avg, Temperature.new(57))
+        self.assertEqual(weather.high, Temperature.new(84))
+        self.assertEqual(weather.low, Temperature.new(49))
+        self.assertEqual(afetch.call_count, 2)
+
+
+class SlowScraper(FakeScraper):
+    cancelled = False
+
+    def get(self):
+        try:
+            for _ in range(100):
+                check()
+                sleep(0.01)
+        except DeadlineError:
+            SlowScraper.cancelled = True
+            raise
+        return super().get()
+
+
+class SecondScraper(FakeScraper):
+    calls = 0
+
+    def get(self):
+        SecondScraper.calls += 1
+        place_id = self._place.id
+        low = Temperature.new(30)
+        return Weather.new(place_id, Temperature.new(70), low, low)
+
+
+@override_settings(WEATHER_HEDGE_DELAY=0.05)
+class HedgedWeatherSourceTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.place = Place.new("22405")
+        SlowScraper.cancelled = False
+        SecondScraper.calls = 0
+        return super().setUp()
+
+    def source(self, primary, secondary=SecondScraper, latency=None):
+        if latency is None:
+            latency = LatencyWindow()
+        return HedgedWeatherSource(
+            self.place,
+            primary.new(self.place),
+            secondary.new(self.place),
+            latency,
+        )
+
+    def test_instantiation(self):
+        source = HedgedWeatherSource.new(self.place)
+        self.assertIsInstance(source, WeatherSource)
+        self.assertIsInstance(source._primary, WeatherScraper)
+        self.assertIsInstance(source._secondary, StoredWeatherSource)
+        self.assertRaises(WeatherError, HedgedWeatherSource.new, "22405")
+
+    def test_fast_primary_is_not_hedged(self):
+        latency = LatencyWindow()
+        weather = self.source(FakeScraper, latency=latency).get()
+        self.assertEqual(weather.high, Temperature.new(80))
+        self.assertEqual(SecondScraper.calls, 0)
+        self.assertEqual(len(latency), 1)
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        weather = self.source(SlowScraper).get()
+        self.assertEqual(weather.high, Temperature.new(70))
+        self.assertEqual(SecondScraper.calls, 1)
+        for _ in range(100):
+            if SlowScraper.cancelled:
+                break
+            sleep(0.01)
+        self.assertTrue(SlowScraper.cancelled)
+
+    def test_failed_primary_falls_back(self):
+        FakeScraper.fail = True
+        try:
+            weather = self.source(FakeScraper).get()
+        finally:
+            FakeScraper.fail = False
+        self.assertEqual(weather.high, Temperature.new(70))
+
+    def test_both_failing_raises(self):
+        FakeScraper.fail = True
+        try:
+            source = self.source(FakeScraper, FakeScraper)
+            self.assertRaises(ValidationError, source.get)
+        finally:
+            FakeScraper.fail = False
+
+    def test_delay_follows_p95(self):
+        latency = LatencyWindow()
+        source = self.source(FakeScraper, latency=latency)
+        self.assertEqual(source.hedge_delay(), 0.05)
+        for i in range(1, 101):
+            latency.record(i / 100)
+        self.assertEqual(source.hedge_delay(), 0.95)
+
+
+class StoredWeatherSourceTests(DjangoTestCase):
+    def setUp(self) -> None:
+        self.place = Place.new("22405")
+        return super().setUp()
+
+    def test_instantiation(self):
+        source = StoredWeatherSource.new(self.place)
+        self.assertIsInstance(source, WeatherSource)
+        self.assertRaises(WeatherError, StoredWeatherSource.new, "22405")
+
+    def test_serves_stored_weather(self):
+        WeatherInfo.objects.create(
+            country="US",
+            zip="22405",
+            historic_avg_temp=57,
+            forecast_high_temp=84,
+            forecast_low_temp=49,
+            weather_updated_on=timezone.now(),
+        )
+        source = StoredWeatherSource.new(self.place)
+        weather = source.get()
+        self.assertEqual(weather.high, Temperature.new(84))
+        self.assertEqual(weather.low, Temperature.new(49))
+        self.assertEqual(source.historic_temp(), Temperature.new(57))
+
+    def test_never_fetched_weather_is_missing(self):
+        WeatherInfo.objects.create(country="US", zip="22405")
+        source = StoredWeatherSource.new(self.place)
+        self.assertRaises(WeatherError, source.get)
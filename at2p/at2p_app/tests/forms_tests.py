@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from at2p_app.data_source.cache import negative_cache
+from at2p_app.forms import ProfileForm
+from at2p_app.geocode import get_geocoder
+from at2p_app.models import Planter
+from at2p_app.postal_index import PostalPlace
+
+UNKNOWN = PostalPlace(None, '00000', float('nan'), float('nan'))
+
+
+@patch('at2p_app.geocode.query_postal_code')
+class ProfileFormTest(TestCase):
+    def setUp(self) -> None:
+        self.planter = Planter.objects.create_user(username='rusty')
+        patcher = patch.dict(negative_cache._entries, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return super().setUp()
+
+    def form(self, zip):
+        data = {'username': 'rusty', 'country': 'US', 'zip': zip}
+        return ProfileForm(data, instance=self.planter)
+
+    def test_valid_zip(self, query):
+        query.return_value = PostalPlace('US', '22407', 38.2688, -77.5476)
+        self.assertTrue(self.form('22407').is_valid())
+
+    def test_unknown_zip_is_remembered(self, query):
+        query.return_value = UNKNOWN
+        for _ in range(3):
+            form = self.form('00000')
+            self.assertFalse(form.is_valid())
+            self.assertIn('Country / ZIP', str(form.non_field_errors()))
+        query.assert_called_once_with('US', '00000')
+
+    @override_settings(GEOCODER_OFFLINE=True)
+    def test_missing_country_data_is_reported(self, query):
+        query.side_effect = lambda country, zip: get_geocoder(country)
+        form = self.form('22407')
+        self.assertFalse(form.is_valid())
+        errors = str(form.non_field_errors())
+        self.assertIn('no bundled postal data for country US', errors)
+        self.assertNotIn('Country / ZIP', errors)
@@ -0,0 +1,67 @@
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from at2p_app import geocode
+
+
+class GeocoderRegistryTests(TestCase):
+    def setUp(self) -> None:
+        self.patcher = patch.dict(geocode._geocoders, clear=True)
+        self.patcher.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    @patch('at2p_app.geocode.pgeocode.Nominatim')
+    def test_each_country_loads_once(self, nominatim):
+        threads = [
+            Thread(target=geocode.get_geocoder, args=('us',))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        geocode.get_geocoder('US')
+        nominatim.assert_called_once_with('US')
+        self.assertEqual(geocode.loaded_countries(), ['US'])
+
+    @patch('at2p_app.geocode.pgeocode.Nominatim')
+    def test_query_uses_registry(self, nominatim):
+        geocode.query_postal_code('US', '22407')
+        geocode.query_postal_code('US', '22405')
+        nominatim.assert_called_once_with('US')
+        query = nominatim.return_value.query_postal_code
+        self.assertEqual(query.call_count, 2)
+
+    @patch('at2p_app.geocode.pgeocode.Nominatim')
+    def test_warm_up(self, nominatim):
+        nominatim.side_effect = [object(), ValueError('download failed')]
+        with self.assertLogs('at2p_app.geocode', level='ERROR'):
+            geocode.warm_up(['US', 'CA'])
+        self.assertEqual(geocode.loaded_countries(), ['US'])
+
+
+class GridCellTests(TestCase):
+    def test_nearby_points_share_a_cell(self):
+        fredericksburg = geocode.grid_cell(38.2150, -77.4605, 0.1)
+        spotsylvania = geocode.grid_cell(38.2688, -77.4706, 0.1)
+        self.assertEqual(fredericksburg, spotsylvania)
+        self.assertEqual(fredericksburg, (38.25, -77.45))
+
+    def test_distant_points_do_not(self):
+        self.assertNotEqual(
+            geocode.grid_cell(38.2150, -77.4605, 0.1),
+            geocode.grid_cell(38.3150, -77.4605, 0.1),
+        )
+
+    @override_settings(WEATHER_GRID_PRECISION=0)
+    def test_disabled(self):
+        self.assertEqual(
+            geocode.grid_cell('38.26881', '-77.54759'), (38.2688, -77.5476)
+        )
@@ -0,0 +1,10 @@
+import time
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    expires = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= expires:
+            return False
+        time.sleep(0.001)
+    return True
@@ -1,5 +1,19 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
 from django.test import TestCase
-from at2p_app.models import Crop, Planter, WeatherInfo
+from django.utils import timezone
+from at2p_app.data_source.cache import forecast_cache, historic_cache
+from at2p_app.models import (
+    Climatology,
+    Crop,
+    CropScore,
+    Planter,
+    TimeToPlant,
+    WeatherInfo,
+)
+from at2p_app.postal_index import PostalPlace
 
 
 class CropTest(TestCase):
@@ -115,3 +129,277 @@ class WeatherInfoTest(TestCase):
         self.assertIsNotNone(w.historic_avg_temp)
         self.assertIsNotNone(w.forecast_high_temp)
         self.assertIsNotNone(w.forecast_low_temp)
+
+    def test_is_fresh(self):
+        w = self.create_weather('US', '22407')
+        self.assertFalse(w.is_fresh())
+        w.weather_updated_on = timezone.now()
+        self.assertTrue(w.is_fresh())
+        w.weather_updated_on = timezone.now() - timedelta(hours=2)
+        self.assertFalse(w.is_fresh())
+        self.assertTrue(w.is_fresh(max_age=3 * 60 * 60))
+
+    def test_checked_marker_counts_as_fresh(self):
+        w = self.create_weather('US', '22407')
+        w.weather_updated_on = timezone.now() - timedelta(days=2)
+        w.weather_checked_on = timezone.now()
+        self.assertTrue(w.is_fresh())
+
+    def test_unchanged_weather_only_marks_checked(self):
+        w = self.create_weather('US', '22407', avg=55, high=70, low=40)
+        w._save_weather(55, (70, 40))
+        changed_on = w.weather_updated_on
+        with self.assertNumQueries(1) as ctx:
+            w._save_weather(55, (70, 40))
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('weather_checked_on', sql)
+        self.assertNotIn('forecast_high_temp', sql)
+        w.refresh_from_db()
+        self.assertEqual(w.weather_updated_on, changed_on)
+        self.assertGreater(w.weather_checked_on, changed_on)
+
+    def test_changed_weather_updates_changed_fields(self):
+        w = self.create_weather('US', '22407', avg=55, high=70, low=40)
+        # The UPDATE, then the lookup of crops to rescore
+        with self.assertNumQueries(2) as ctx:
+            w._save_weather(55, (72, 40))
+        sql = ctx.captured_queries[0]['sql']
+        self.assertIn('forecast_high_temp', sql)
+        self.assertNotIn('forecast_low_temp', sql)
+        w.refresh_from_db()
+        self.assertEqual(w.forecast_high_temp, 72)
+        self.assertEqual(w.weather_updated_on, w.weather_checked_on)
+
+
+@patch('at2p_app.geocode.query_postal_code')
+class GeocodeOnceTest(TestCase):
+    place = PostalPlace('US', '22407', 38.2688, -77.5476)
+
+    def test_geocodes_once(self, query):
+        query.return_value = self.place
+        w = WeatherInfo.objects.create(country='US', zip='22407')
+        self.assertTrue(w.needs_geocode())
+        w.clean()
+        w.clean()
+        w = WeatherInfo.objects.get(pk=w.pk)
+        w.clean()
+        self.assertEqual(query.call_count, 1)
+        self.assertEqual(float(w.lat), 38.2688)
+        self.assertEqual(w.geocoded_for, 'US:22407')
+
+    def test_zip_change_geocodes_again(self, query):
+        query.return_value = self.place
+        w = WeatherInfo.objects.create(country='US', zip='22407')
+        w.clean()
+        w.zip = '22405'
+        self.assertTrue(w.needs_geocode())
+        w.clean()
+        self.assertEqual(query.call_count, 2)
+
+    def test_nearby_zips_share_a_weather_cell(self, query):
+        query.side_effect = [
+            PostalPlace('US', '22401', 38.2150, -77.4605),
+            PostalPlace('US', '22407', 38.2688, -77.4706),
+        ]
+        a = WeatherInfo.objects.create(country='US', zip='22401')
+        b = WeatherInfo.objects.create(country='US', zip='22407')
+        a.clean()
+        b.clean()
+        self.assertEqual(a.weather_cell(), b.weather_cell())
+
+    def test_backfill_command(self, query):
+        query.return_value = self.place
+        WeatherInfo.objects.create(country='US', zip='22407')
+        WeatherInfo.objects.create(country='US', zip='22405')
+        out = StringIO()
+        call_command('backfill_geocodes', stdout=out)
+        call_command('backfill_geocodes', stdout=out)
+        self.assertEqual(query.call_count, 2)
+        self.assertFalse(
+            WeatherInfo.objects.filter(geocoded_for__isnull=True).exists()
+        )
+
+
+class ClimatologyTest(TestCase):
+    cell = (38.25, -77.45)
+
+    def setUp(self) -> None:
+        self.weather = WeatherInfo.objects.create(
+            country='US', zip='22407', lat=38.2688, long=-77.4706,
+            geocoded_for='US:22407',
+        )
+        for cache in (historic_cache, forecast_cache):
+            patcher = patch.dict(cache._entries, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return super().setUp()
+
+    def test_record_and_lookup(self):
+        self.assertIsNone(Climatology.lookup(self.cell, 5))
+        Climatology.record(self.cell, 61, 5)
+        Climatology.record(self.cell, 62, 5)
+        self.assertEqual(Climatology.lookup(self.cell, 5), 62)
+        self.assertIsNone(Climatology.lookup(self.cell, 6))
+        self.assertEqual(Climatology.objects.count(), 1)
+
+    @patch('at2p_app.models.forecast_high_low', return_value=[80, 50])
+    @patch('at2p_app.models.historic_temp', return_value=59)
+    def test_update_weather_uses_stored_average(self, historic, forecast):
+        Climatology.record(self.cell, 64)
+        self.weather.update_weather()
+        historic.assert_not_called()
+        self.assertEqual(self.weather.historic_avg_temp, 64)
+
+    @patch('at2p_app.models.forecast_high_low', return_value=[80, 50])
+    @patch('at2p_app.models.historic_temp', return_value=59)
+    def test_update_weather_stores_average(self, historic, forecast):
+        self.weather.update_weather()
+        historic.assert_called_once_with(*self.cell)
+        self.assertEqual(Climatology.lookup(self.cell), 59)
+
+    @patch('at2p_app.models.forecast_high_low', return_value=[80, 50])
+    @patch('at2p_app.models.historic_temp', side_effect=[45, 38])
+    def test_month_rollover_scrapes_new_average(self, historic, forecast):
+        with patch('at2p_app.models.timezone.localdate') as localdate:
+            localdate.return_value = date(2026, 10, 31)
+            self.weather.update_weather()
+            localdate.return_value = date(2026, 11, 1)
+            self.weather.update_weather()
+        self.assertEqual(historic.call_count, 2)
+        self.assertEqual(
+            list(
+                Climatology.objects.order_by('month').values_list(
+                    'month', 'avg_temp'
+                )
+            ),
+            [(10, 45), (11, 38)],
+        )
+        self.assertEqual(self.weather.historic_avg_temp, 38)
+
+    @patch('at2p_app.models.forecast_high_low', return_value=[80, 50])
+    @patch('at2p_app.models.historic_temp', return_value=59)
+    def test_cached_forecast_is_not_rewritten(self, historic, forecast):
+        self.weather.update_weather()
+        checked = self.weather.weather_checked_on
+        # Only the Climatology lookup; no UPDATE for a cache hit
+        with self.assertNumQueries(1):
+            self.weather.update_weather()
+        forecast.assert_called_once()
+        self.weather.refresh_from_db()
+        self.assertEqual(self.weather.weather_checked_on, checked)
+
+    @patch('at2p_app.management.commands.prefill_climatology.historic_temp')
+    def test_prefill_command(self, historic):
+        historic.return_value = 57
+        WeatherInfo.objects.create(
+            country='US', zip='22401', lat=38.2150, long=-77.4605,
+            geocoded_for='US:22401',
+        )
+        call_command('prefill_climatology', stdout=StringIO())
+        call_command('prefill_climatology', stdout=StringIO())
+        historic.assert_called_once_with(*self.cell)
+        self.assertEqual(Climatology.lookup(self.cell), 57)
+
+
+class CropScoreTest(TestCase):
+    def setUp(self) -> None:
+        self.planter = Planter.objects.create_user(
+            username='rusty', password='b@A6&Zb!N&^W', zip='22407'
+        )
+        self.weather = WeatherInfo.objects.create(
+            country='US',
+            zip='22407',
+            historic_avg_temp=70,
+            forecast_high_temp=79,
+            forecast_low_temp=41,
+        )
+        self.crops = [
+            self.create_crop('Boberries', 40),
+            self.create_crop('Coldberries', 45),
+        ]
+        for crop in self.crops:
+            TimeToPlant.objects.create(planter=self.planter, crop=crop)
+        return super().setUp()
+
+    def create_crop(self, name, min_temp):
+        return Crop.objects.create(
+            name=name,
+            min_temp=min_temp,
+            min_opt_temp=65,
+            max_opt_temp=75,
+            max_temp=80,
+        )
+
+    def score(self, name):
+        return CropScore.objects.get(weather=self.weather, crop__name=name)
+
+    def test_update_scores(self):
+        CropScore.update_scores(self.weather)
+        warm, cold = self.score('Boberries'), self.score('Coldberries')
+        self.assertTrue(warm.plantable)
+        self.assertEqual(warm.plantable_score, 1.0)
+        self.assertFalse(cold.plantable)
+        self.assertAlmostEqual(cold.chill, 0.2)
+        self.assertEqual(cold.plantable_score, 0.82)
+
+    def test_scores_are_shared_by_location(self):
+        neighbour = Planter.objects.create_user(
+            username='dusty', password='b@A6&Zb!N&^W', zip='22407'
+        )
+        for crop in self.crops:
+            TimeToPlant.objects.create(planter=neighbour, crop=crop)
+        CropScore.update_scores(self.weather)
+        self.assertEqual(CropScore.objects.count(), len(self.crops))
+
+    def test_update_scores_uses_constant_queries(self):
+        for name in ('Aberries', 'Ceeberries', 'Deeberries'):
+            TimeToPlant.objects.create(
+                planter=self.planter, crop=self.create_crop(name, 40)
+            )
+        # crops, existing scores, SAVEPOINT, INSERT, RELEASE SAVEPOINT
+        with self.assertNumQueries(5):
+            CropScore.update_scores(self.weather)
+        self.assertEqual(CropScore.objects.count(), 5)
+
+    def test_unchanged_scores_are_not_rewritten(self):
+        CropScore.update_scores(self.weather)
+        updated_on = {s.pk: s.updated_on for s in CropScore.objects.all()}
+        with self.assertNumQueries(2):
+            CropScore.update_scores(self.weather)
+        for s in CropScore.objects.all():
+            self.assertEqual(s.updated_on, updated_on[s.pk])
+
+    def test_weather_change_rescores_location(self):
+        CropScore.update_scores(self.weather)
+        self.weather._save_weather(70, (79, 30))
+        cold = self.score('Coldberries')
+        self.assertEqual(cold.scored_weather, '70:79:30')
+        self.assertGreater(cold.chill, 0.2)
+
+    def test_crop_edit_rescores_its_scores(self):
+        CropScore.update_scores(self.weather)
+        crop = Crop.objects.get(name='Coldberries')
+        crop.min_temp = 40
+        crop.save()
+        cold = self.score('Coldberries')
+        self.assertEqual(cold.scored_crop, '40:65:75:80')
+        self.assertTrue(cold.plantable)
+        self.assertEqual(cold.plantable_score, 1.0)
+
+    def test_plantings_join_shared_scores(self):
+        CropScore.update_scores(self.weather)
+        plantings = TimeToPlant.with_scores(
+            TimeToPlant.objects.filter(planter=self.planter), self.weather
+        ).order_by('-plantable_score')
+        self.assertEqual(
+            [(p.crop.name, p.plantable) for p in plantings],
+            [('Boberries', True), ('Coldberries', False)],
+        )
+        self.assertEqual(plantings[0].plantable_score, 1.0)
+
+    def test_unscored_plantings_have_no_score(self):
+        plantings = TimeToPlant.with_scores(
+            TimeToPlant.objects.filter(planter=self.planter), self.weather
+        )
+        self.assertEqual(len(plantings), 2)
+        self.assertIsNone(plantings[0].plantable_score)
@@ -0,0 +1,130 @@
+import os
+import zipfile
+from io import StringIO
+from math import isnan
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from django.core.management import call_command
+from django.test import override_settings
+from at2p_app import geocode
+from django.core.exceptions import ValidationError
+from at2p_app.postal_index import (
+    PostalIndex,
+    bundle_dir,
+    bundle_manifest,
+    get_index,
+    read_postal_file,
+)
+
+
+class PostalIndexTests(TestCase):
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.index = PostalIndex.build(
+            'us',
+            ['22407', '22405', '22401', '22401'],
+            [38.2688, 38.3365, 38.30, 38.40],
+            [-77.5476, -77.4366, -77.45, -77.55],
+            self.tmp.name,
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        return super().tearDown()
+
+    def test_index_is_memory_mapped(self):
+        loaded = PostalIndex.load('US', self.tmp.name)
+        self.assertIsInstance(loaded.keys, np.memmap)
+        self.assertIsInstance(loaded.coords, np.memmap)
+        self.assertEqual(loaded.coords.dtype, np.float32)
+        self.assertEqual(len(loaded), 3)
+
+    def test_lookup(self):
+        place = self.index.lookup('22407')
+        self.assertEqual(place.country_code, 'US')
+        self.assertAlmostEqual(place.latitude, 38.2688, places=4)
+        self.assertAlmostEqual(place.longitude, -77.5476, places=4)
+
+    def test_duplicate_codes_are_averaged(self):
+        place = self.index.lookup('22401')
+        self.assertAlmostEqual(place.latitude, 38.35, places=4)
+
+    def test_unknown_code(self):
+        place = self.index.lookup('99999')
+        self.assertIsNone(place.country_code)
+        self.assertTrue(isnan(place.latitude))
+
+    def test_split_countries_use_first_part(self):
+        index = PostalIndex.build(
+            'CA', ['K1A'], [45.4], [-75.7], self.tmp.name
+        )
+        self.assertEqual(index.lookup('k1a 0b1').country_code, 'CA')
+
+    def test_geocoder_prefers_index(self):
+        with override_settings(POSTAL_INDEX_DIR=self.tmp.name), patch(
+            'at2p_app.geocode.pgeocode.Nominatim'
+        ) as nominatim:
+            self.assertIsNotNone(get_index('US'))
+            place = geocode.query_postal_code('US', '22405')
+            self.assertIsNone(get_index('FR'))
+        nominatim.assert_not_called()
+        self.assertEqual(place.country_code, 'US')
+
+    @patch('at2p_app.management.commands.build_postal_index.pgeocode')
+    def test_build_command(self, pgeocode):
+        pgeocode.Nominatim.return_value._data = pd.DataFrame({
+            'postal_code': ['22407', None],
+            'latitude': [38.2688, 1.0],
+            'longitude': [-77.5476, 1.0],
+        })
+        call_command('build_postal_index', 'US', output=self.tmp.name,
+                     bundle_version='v1', stdout=StringIO())
+        directory = bundle_dir(self.tmp.name)
+        self.assertTrue(directory.endswith('v1'))
+        self.assertEqual(len(PostalIndex.load('US', directory)), 1)
+
+    def test_build_command_from_files(self):
+        source = os.path.join(self.tmp.name, 'source')
+        os.makedirs(source)
+        with open(os.path.join(source, 'US.txt'), 'w') as f:
+            f.write('US\t22407\tFredericksburg\tVirginia\tVA\t\t\t\t\t'
+                    '38.2688\t-77.5476\t4\n')
+        with zipfile.ZipFile(os.path.join(source, 'CA.zip'), 'w') as z:
+            z.writestr('CA.txt', 'CA\tK1A\tOttawa\t\t\t\t\t\t\t'
+                                 '45.4\t-75.7\t6\n')
+        output = os.path.join(self.tmp.name, 'bundle')
+        err = StringIO()
+        call_command('build_postal_index', 'US', 'CA', 'FR',
+                     source=source, output=output, bundle_version='v2',
+                     stdout=StringIO(), stderr=err)
+        self.assertIn('FR: skipped', err.getvalue())
+        manifest = bundle_manifest(output)
+        self.assertEqual(manifest['version'], 'v2')
+        self.assertEqual(manifest['countries'], {'US': 1, 'CA': 1})
+        index = PostalIndex.load('US', bundle_dir(output))
+        self.assertEqual(index.lookup('22407').country_code, 'US')
+
+    def test_read_pgeocode_cache_format(self):
+        path = os.path.join(self.tmp.name, 'US.txt')
+        with open(path, 'w') as f:
+            f.write('country_code,postal_code,latitude,longitude\n'
+                    'US,22407,38.2688,-77.5476\n'
+                    'US,22408,,\n')
+        codes, lats, longs = read_postal_file(self.tmp.name, 'US')
+        self.assertEqual(codes, ['22407'])
+        self.assertEqual(lats, [38.2688])
+
+    def test_offline_geocoder_never_downloads(self):
+        with override_settings(
+            POSTAL_INDEX_DIR=self.tmp.name, GEOCODER_OFFLINE=True
+        ), patch('at2p_app.geocode.pgeocode.Nominatim') as nominatim:
+            place = geocode.query_postal_code('US', '22407')
+            self.assertEqual(place.country_code, 'US')
+            with self.assertRaisesRegex(ValidationError, 'country FR'):
+                geocode.query_postal_code('FR', '75001')
+        nominatim.assert_not_called()
@@ -0,0 +1,60 @@
+from math import exp
+from unittest import TestCase
+
+import numpy as np
+from at2p_app.domain.use_cases.plantability import CropScores, score_crops
+
+CROPS = [
+    # min, opt low, opt high, max
+    (40, 65, 75, 80),
+    (45, 60, 70, 85),
+    (28, 40, 75, 85),
+    (50, 70, 90, 100),
+    (60, 70, 70, 95),
+]
+
+
+def scalar_score(low, high, soil, mn, ol, oh, mx):
+    chill = max((mn - low), 0) / max((ol - mn), 1)
+    cook = max((high - mx), 0) / max((mx - oh), 1)
+    sl = max(max(soil - oh, 0), max(ol - soil, 0)) / max(oh - ol, 1)
+    score = round(exp(-max(chill, cook, sl)), 2)
+    plantable = (high > ol) and (low < oh) and low >= mn and high <= mx
+    return score, chill, cook, sl, plantable
+
+
+class ScoreCropsTests(TestCase):
+    def score(self, low, high, soil):
+        return score_crops(low, high, soil, *zip(*CROPS))
+
+    def test_returns_one_value_per_crop(self):
+        scores = self.score(41, 79, 70)
+        self.assertIsInstance(scores, CropScores)
+        for values in scores:
+            self.assertEqual(len(values), len(CROPS))
+
+    def test_matches_scalar_scoring(self):
+        for low, high, soil in [(41, 79, 70), (20, 95, 50), (55, 72, 68)]:
+            scores = self.score(low, high, soil)
+            for i, crop in enumerate(CROPS):
+                score, chill, cook, sl, plantable = scalar_score(
+                    low, high, soil, *crop
+                )
+                self.assertAlmostEqual(scores.score[i], score)
+                self.assertAlmostEqual(scores.chill[i], chill)
+                self.assertAlmostEqual(scores.cook[i], cook)
+                self.assertAlmostEqual(scores.soil[i], sl)
+                self.assertEqual(bool(scores.plantable[i]), plantable)
+
+    def test_equal_optimal_bounds_do_not_divide_by_zero(self):
+        scores = score_crops(50, 80, 75, [60], [70], [70], [95])
+        self.assertTrue(np.isfinite(scores.soil).all())
+
+    def test_margin(self):
+        scores = self.score(41, 79, 70)
+        self.assertEqual(scores.margin[0], 1)
+        self.assertLess(scores.margin[1], 0)
+
+    def test_empty_catalog(self):
+        scores = score_crops(41, 79, 70, [], [], [], [])
+        self.assertEqual(len(scores.score), 0)
@@ -51,3 +51,18 @@ class CropRecommenderTests(TestCase):
         r = self.recommender.crop(crop)
         self.assertFalse(r.recommended)
         self.assertTrue(r.margin.temp < 0)
+
+    def test_batch_recommendations(self):
+        crops = [
+            self.crop,
+            Crop.new(
+                name="Coldberries",
+                abs_range=TempRange.new(45, 80),
+                opt_range=TempRange.new(65, 75),
+            ),
+        ]
+        recs = self.recommender.crops(crops)
+        self.assertEqual([r.crop for r in recs], crops)
+        self.assertEqual([r.recommended for r in recs], [True, False])
+        single = self.recommender.crop(self.crop)
+        self.assertEqual(recs[0].margin, single.margin)
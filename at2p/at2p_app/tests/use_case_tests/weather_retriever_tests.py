@@ -0,0 +1,45 @@
+import asyncio
+from unittest import TestCase
+from at2p_app.data_source.weather_source import AsyncWeatherScraper
+from at2p_app.domain.common.error import WeatherError
+from at2p_app.domain.entities.place import Place
+from at2p_app.domain.use_cases.get_weather import (
+    AsyncWeatherRetriever,
+    WeatherRetriever,
+)
+from at2p_app.domain.value_objects.weather import Weather
+from at2p_app.tests.data_source_tests.weather_source_tests import FakeScraper
+
+
+class ScraperRetriever(WeatherRetriever):
+    def __init__(self, weather_source) -> None:
+        self._weather_source = weather_source
+
+    def get_weather(self, place: Place):
+        return type(self._weather_source).new(place).get()
+
+
+class WeatherRetrieverTests(TestCase):
+    def test_get_many(self):
+        retriever = ScraperRetriever.new(FakeScraper.new(Place.new("22405")))
+        places = [Place.new("22405"), Place.new("22407")]
+        results = list(retriever.get_many(places, max_workers=2))
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(r.ok for r in results))
+
+
+class AsyncWeatherRetrieverTests(TestCase):
+    def test_validation(self):
+        scraper = FakeScraper.new(Place.new("22405"))
+        self.assertRaises(WeatherError, AsyncWeatherRetriever.new, scraper)
+
+    def test_aget_weather(self):
+        class AsyncFake(AsyncWeatherScraper, FakeScraper):
+            async def aget(self):
+                return self.get()
+
+        retriever = AsyncWeatherRetriever.new(
+            AsyncFake.new(Place.new("22405"))
+        )
+        weather = asyncio.run(retriever.aget_weather(Place.new("22407")))
+        self.assertIsInstance(weather, Weather)
@@ -0,0 +1,186 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from at2p_app.data_source.cache import forecast_cache, historic_cache
+from at2p_app.domain.common.error import DeadlineError
+from at2p_app.models import Crop, CropScore, Planter, TimeToPlant, WeatherInfo
+from at2p_app.views import AsyncProfile
+
+
+@override_settings(PROFILE_STALE_WHILE_REVALIDATE=True)
+class ProfileStaleWhileRevalidateTest(TestCase):
+    def setUp(self) -> None:
+        self.planter = Planter.objects.create_user(
+            username='rusty', password='b@A6&Zb!N&^W', zip='22407'
+        )
+        self.client.force_login(self.planter)
+        self.weather = WeatherInfo.objects.create(
+            country='US',
+            zip='22407',
+            lat=38.2688,
+            long=-77.5476,
+            historic_avg_temp=55,
+            forecast_high_temp=70,
+            forecast_low_temp=40,
+            weather_updated_on=timezone.now(),
+        )
+        return super().setUp()
+
+    @patch('at2p_app.views.enqueue_refresh')
+    def test_fresh_weather_is_served_without_refresh(self, enqueue):
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['high'], 70)
+        self.assertEqual(response.context['low'], 40)
+        self.assertEqual(response.context['soil'], 55)
+        enqueue.assert_not_called()
+
+    @patch('at2p_app.views.enqueue_refresh')
+    def test_stale_weather_is_served_and_refreshed(self, enqueue):
+        stale = timezone.now() - timedelta(days=1)
+        WeatherInfo.objects.filter(pk=self.weather.pk).update(
+            weather_updated_on=stale
+        )
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.context['high'], 70)
+        self.assertEqual(response.context['weather_updated_on'], stale)
+        enqueue.assert_called_once_with(self.weather.pk)
+
+    @patch('at2p_app.views.enqueue_refresh')
+    def test_plantings_show_shared_scores(self, enqueue):
+        crop = Crop.objects.create(
+            name='Boberries',
+            min_temp=30,
+            min_opt_temp=50,
+            max_opt_temp=60,
+            max_temp=80,
+        )
+        TimeToPlant.objects.create(planter=self.planter, crop=crop)
+        CropScore.update_scores(self.weather)
+        response = self.client.get(reverse('profile'))
+        planting, = response.context['plantings']
+        self.assertTrue(planting.plantable)
+        self.assertEqual(planting.plantable_score, 1.0)
+
+    @patch('at2p_app.views.enqueue_refresh')
+    def test_new_planting_is_scored_while_weather_is_fresh(self, enqueue):
+        crop = Crop.objects.create(
+            name='Boberries',
+            min_temp=30,
+            min_opt_temp=50,
+            max_opt_temp=60,
+            max_temp=80,
+        )
+        TimeToPlant.objects.create(planter=self.planter, crop=crop)
+        response = self.client.get(reverse('profile'))
+        planting, = response.context['plantings']
+        self.assertTrue(planting.plantable)
+        self.assertEqual(planting.plantable_score, 1.0)
+        enqueue.assert_not_called()
+
+
+@override_settings(PROFILE_STALE_WHILE_REVALIDATE=False)
+class ProfileDeadlineTest(TestCase):
+    def setUp(self) -> None:
+        self.planter = Planter.objects.create_user(
+            username='rusty', password='b@A6&Zb!N&^W', zip='22407'
+        )
+        self.client.force_login(self.planter)
+        self.weather = WeatherInfo.objects.create(
+            country='US',
+            zip='22407',
+            historic_avg_temp=55,
+            forecast_high_temp=70,
+            forecast_low_temp=40,
+            weather_updated_on=timezone.now() - timedelta(days=1),
+        )
+        return super().setUp()
+
+    @patch('at2p_app.views.enqueue_refresh')
+    @patch.object(WeatherInfo, 'update_weather')
+    def test_missed_deadline_serves_stored_weather(self, update, enqueue):
+        update.side_effect = DeadlineError('22407')
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['high'], 70)
+        self.assertEqual(response.context['soil'], 55)
+        enqueue.assert_called_once_with(self.weather.pk)
+
+
+@override_settings(PROFILE_STALE_WHILE_REVALIDATE=True)
+class AsyncProfileTest(TestCase):
+    def setUp(self) -> None:
+        self.planter = Planter.objects.create_user(
+            username='rusty', password='b@A6&Zb!N&^W', zip='22407'
+        )
+        self.factory = RequestFactory()
+        return super().setUp()
+
+    async def get(self, user):
+        request = self.factory.get(reverse('profile'))
+        request.user = user
+        return await AsyncProfile.as_view()(request)
+
+    async def test_anonymous_user_is_redirected(self):
+        response = await self.get(AnonymousUser())
+        self.assertEqual(response.status_code, 302)
+
+    @patch('at2p_app.views.enqueue_refresh')
+    async def test_stored_weather_is_served(self, enqueue):
+        await WeatherInfo.objects.acreate(
+            country='US',
+            zip='22407',
+            historic_avg_temp=55,
+            forecast_high_temp=70,
+            forecast_low_temp=40,
+            weather_updated_on=timezone.now(),
+        )
+        response = await self.get(self.planter)
+        self.assertEqual(response.context_data['high'], 70)
+        self.assertEqual(response.context_data['planter'], self.planter)
+        self.assertEqual(response.context_data['plantings'], [])
+        enqueue.assert_not_called()
+
+    @patch('at2p_app.views.enqueue_refresh')
+    async def test_new_planting_is_scored_while_weather_is_fresh(
+        self, enqueue
+    ):
+        await WeatherInfo.objects.acreate(
+            country='US',
+            zip='22407',
+            historic_avg_temp=55,
+            forecast_high_temp=70,
+            forecast_low_temp=40,
+            weather_updated_on=timezone.now(),
+        )
+        crop = await Crop.objects.acreate(
+            name='Boberries',
+            min_temp=30,
+            min_opt_temp=50,
+            max_opt_temp=60,
+            max_temp=80,
+        )
+        await TimeToPlant.objects.acreate(planter=self.planter, crop=crop)
+        response = await self.get(self.planter)
+        planting, = response.context_data['plantings']
+        self.assertTrue(planting.plantable)
+        self.assertEqual(planting.plantable_score, 1.0)
+
+    @patch('at2p_app.models.aforecast_high_low')
+    @patch('at2p_app.models.ahistoric_temp')
+    async def test_first_view_awaits_weather(self, historic, forecast):
+        historic.return_value = 58
+        forecast.return_value = [81, 47]
+        await WeatherInfo.objects.acreate(
+            country='US', zip='22407', lat=38.2688, long=-77.5476,
+            geocoded_for='US:22407',
+        )
+        with patch.dict(historic_cache._entries, clear=True), \
+                patch.dict(forecast_cache._entries, clear=True):
+            response = await self.get(self.planter)
+        self.assertEqual(response.context_data['soil'], 58)
+        self.assertEqual(response.context_data['high'], 81)
+        self.assertEqual(response.context_data['low'], 47)
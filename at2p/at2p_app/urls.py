@@ -1,18 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from at2p_app.views import Home, Register, Authenticate, Deauthenticate
-from at2p_app.views import Profile, ProfileEdit
+from at2p_app.views import AsyncProfile, Profile, ProfileEdit
 from at2p_app.views import ImportCrops, CropAdd, CropView, CropDelete
 from at2p_app.views import AuthReset, AuthResetConfirm, AuthResetComplete
 from at2p_app.views import AuthResetDone, PassChange, PassChangeDone
 
 
+ProfileView = AsyncProfile if settings.PROFILE_ASYNC else Profile
+
 urlpatterns = [
     path('crop/new', CropAdd.as_view(), name='crop-new'),
     path('crop/<slug>/delete', CropDelete.as_view(), name='crop-delete'),
     path('crop/<slug:slug>', CropView.as_view(), name='crop-detail'),
     path('import', ImportCrops.as_view(), name='load-crops'),
     path('crop/new', CropAdd.as_view(), name='crop-add'),
-    path('profile', Profile.as_view(), name='profile'),
+    path('profile', ProfileView.as_view(), name='profile'),
     path('profile/edit', ProfileEdit.as_view(), name='profile-edit'),
     path('home', Home.as_view(), name='home'),
     path('register', Register.as_view(), name='register'),
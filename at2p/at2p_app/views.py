@@ -1,5 +1,7 @@
 import csv
 from typing import Any, Dict, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.auth.views import LoginView, LogoutView
@@ -9,15 +11,26 @@ from django.contrib.auth.views import PasswordResetView
 from django.contrib.auth.views import PasswordResetConfirmView
 from django.contrib.auth.views import PasswordResetDoneView
 from django.contrib.auth.views import PasswordResetCompleteView
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
 from django.utils.text import slugify
 from django.views import generic
+from .background import enqueue_refresh
+from .data_source.deadline import deadline
+from .domain.common.error import DeadlineError
 from .forms import NewPlanterForm, ProfileForm, NewCropForm
-from .models import TimeToPlant, Crop, Planter, WeatherInfo
+from .models import TimeToPlant, Crop, CropScore, Planter, WeatherInfo
 
 from django.contrib.auth.decorators import user_passes_test
 
 
+def serve_stale(w: WeatherInfo) -> bool:
+    if not settings.PROFILE_STALE_WHILE_REVALIDATE:
+        return False
+    return w.weather_updated_on is not None
+
+
 class CropView(generic.DetailView):
     model = Crop
     template_name = 'crops/crop_detail.html'
@@ -80,24 +93,31 @@ class Profile(generic.DetailView, LoginRequiredMixin):
         if planter.zip is None:
             return context
 
-        if not WeatherInfo.objects.filter(
+        w, created = WeatherInfo.objects.get_or_create(
             country=planter.country, zip=planter.zip
-        ).exists():
-            WeatherInfo.objects.create(
-                country=planter.country, zip=planter.zip
-            )
-        w = WeatherInfo.objects.get(country=planter.country, zip=planter.zip)
-        w.clean()
-        w.update_weather()
-
-        plantings = TimeToPlant.objects.filter(planter=planter.pk)
-        for p in plantings:
-            p.update_plantable(w)
+        )
+        plantings = TimeToPlant.objects.filter(
+            planter=planter.pk
+        ).select_related('crop')
+        if serve_stale(w):
+            if not w.is_fresh(settings.WEATHER_REFRESH_AFTER):
+                enqueue_refresh(w.pk)
+        else:
+            try:
+                with deadline(settings.PROFILE_WEATHER_DEADLINE):
+                    w.update_weather()
+            except DeadlineError:
+                enqueue_refresh(w.pk)
+        # No-op once current; scores crops planted since the last refresh
+        CropScore.update_scores(w)
 
         context['soil'] = w.historic_avg_temp
         context['high'] = w.forecast_high_temp
         context['low'] = w.forecast_low_temp
-        context['plantings'] = plantings.order_by('-plantable_score')
+        context['weather_updated_on'] = w.last_checked()
+        context['plantings'] = TimeToPlant.with_scores(
+            plantings, w
+        ).order_by('-plantable_score')
         return context
 
     def get_object(self) -> Planter:
@@ -105,6 +125,50 @@ class Profile(generic.DetailView, LoginRequiredMixin):
         return planter
 
 
+class AsyncProfile(generic.View):
+    login_url = reverse_lazy('auth')
+    template_name = 'core/profile.html'
+
+    async def get(self, request, *args: Any, **kwargs: Any):
+        user = await sync_to_async(lambda: request.user)()
+        if not user.is_authenticated:
+            return redirect(self.login_url)
+        planter = await Planter.objects.aget(pk=user.pk)
+        context = {'planter': planter, 'object': planter, 'title': planter}
+        if planter.zip is not None:
+            context.update(await self.weather_context(planter))
+        return TemplateResponse(request, self.template_name, context)
+
+    async def weather_context(self, planter: Planter) -> Dict[str, Any]:
+        w, created = await WeatherInfo.objects.aget_or_create(
+            country=planter.country, zip=planter.zip
+        )
+        plantings = TimeToPlant.objects.filter(
+            planter=planter.pk
+        ).select_related('crop')
+        if serve_stale(w):
+            if not w.is_fresh(settings.WEATHER_REFRESH_AFTER):
+                enqueue_refresh(w.pk)
+        else:
+            try:
+                with deadline(settings.PROFILE_WEATHER_DEADLINE):
+                    await w.aupdate_weather()
+            except DeadlineError:
+                enqueue_refresh(w.pk)
+        await sync_to_async(CropScore.update_scores)(w)
+        plantings = TimeToPlant.with_scores(plantings, w)
+
+        return {
+            'soil': w.historic_avg_temp,
+            'high': w.forecast_high_temp,
+            'low': w.forecast_low_temp,
+            'weather_updated_on': w.last_checked(),
+            'plantings': [
+                p async for p in plantings.order_by('-plantable_score')
+            ],
+        }
+
+
 class ProfileEdit(generic.UpdateView, LoginRequiredMixin):
     model = Planter
     template_name = 'core/profile_edit.html'